@@ -8,16 +8,45 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # 2. Local imports
 from core.utils import create_pdf
-from core.engine import IthubaEngine
+from core.render import parse_markdown, to_markdown
+from core.ats import extract_keywords, score_profile
+from core.telemetry import tracer
+from core.cache import ArtifactStore
+from core.engine import IthubaEngine, read_audio
+from core.jobs import DONE, JobExecutor, QueueFullError
+from core.ratelimit import limiter
 from core.languages import UI_TRANSLATIONS 
 
 # --- INITIALIZE SESSION STATE ---
-if 'pdf_data' not in st.session_state:
-    st.session_state.pdf_data = None
-if 'current_profile' not in st.session_state:
-    st.session_state.current_profile = None
-if 'transcribed_text' not in st.session_state:
-    st.session_state.transcribed_text = ""
+# Sessions hold artifact-store handles, not the PDF / profile themselves
+if 'pdf_handle' not in st.session_state:
+    st.session_state.pdf_handle = None
+if 'profile_handle' not in st.session_state:
+    st.session_state.profile_handle = None
+# The story box's contents (transcript plus the user's edits). Kept here, not in the artifact
+# store: if the store evicted it, the text area would reset and the edits would be lost
+if 'story' not in st.session_state:
+    st.session_state.story = ""
+if 'transcribed_key' not in st.session_state:
+    st.session_state.transcribed_key = None
+# Hashes of the story, JD and language the current profile was written from, and the name on its PDF
+if 'profile_basis' not in st.session_state:
+    st.session_state.profile_basis = None
+if 'pdf_spec' not in st.session_state:
+    st.session_state.pdf_spec = None
+# Extra-language CVs: language -> {"profile": handle, "pdf": handle}, and the (name, low_data) on their PDFs
+if 'translations' not in st.session_state:
+    st.session_state.translations = {}
+if 'translations_spec' not in st.session_state:
+    st.session_state.translations_spec = None
+# kind ("transcribe" / "generate" / "translate") -> ID of this session's job in the shared executor
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+
+POLL_SECONDS = 0.5
+BUSY_MESSAGE = "Ithuba is very busy right now. Please try again in a moment."
+# Size cap for the low-data PDF option; above it the embedded Unicode font is traded for transliteration
+LOW_DATA_PDF_KB = float(os.getenv("ITHUBA_PDF_LOW_DATA_KB", "8"))
 
 # Page Config
 st.set_page_config(page_title="Ithuba", page_icon="🇿🇦", layout="centered")
@@ -61,6 +90,136 @@ def get_engine():
     return IthubaEngine()
 engine = get_engine()
 
+# Provider work runs here, so a rerun (click, resize, second tab) no longer throws it away
+@st.cache_resource
+def get_jobs():
+    return JobExecutor.from_env()
+jobs = get_jobs()
+
+# One memory budget for every session's generated artifacts; overflow spills to disk
+@st.cache_resource
+def get_artifacts():
+    return ArtifactStore.from_env()
+artifacts = get_artifacts()
+
+
+def transcribe(audio, language):
+    """Transcription job; returns the transcript, which goes straight into the story box."""
+    return engine.transcribe_audio(audio, lang_name=language)
+
+
+def render_pdf(profile_text, pdf_spec):
+    """PDF bytes for a (name, low_data) spec, via the engine's PDF cache."""
+    name, low_data = pdf_spec
+    max_kb = LOW_DATA_PDF_KB if low_data else None
+    render = lambda text, user_name: create_pdf(text, user_name=user_name, max_kb=max_kb)
+    return engine.profile_cache.pdf(profile_text, name, render, variant=f"max_kb={max_kb}")
+
+
+def store_profile(profile_text, pdf_spec, basis):
+    """Renders the PDF and returns the artifact handles a finished job hands back to the session."""
+    pdf_bytes = render_pdf(profile_text, pdf_spec)
+    return {"profile": artifacts.put(profile_text), "pdf": artifacts.put(pdf_bytes) if pdf_bytes else None,
+            "basis": basis, "pdf_spec": pdf_spec}
+
+
+def build_profile(story, job_description, language, pdf_spec, force, basis):
+    """Generation job: streams the profile into the job's progress, then renders the PDF."""
+    parts = []
+    for chunk in engine.stream_professional_profile(story, target_language=language,
+                                                    job_description=job_description, force=force):
+        parts.append(chunk)
+        yield chunk
+    return store_profile("".join(parts), pdf_spec, basis)
+
+
+def update_profile(profile_handle, story, job_description, language, pdf_spec, basis):
+    """JD-only change: rewrites the competencies and experience sections, keeps the rest.
+    A failed rewrite raises, so the job fails and the session keeps its current profile."""
+    profile_text = engine.regenerate_sections(artifacts.get(profile_handle), story, target_language=language,
+                                              job_description=job_description)
+    return store_profile(profile_text, pdf_spec, basis)
+
+
+def store_translations(results):
+    """Artifact handles per language from generate_profiles results, or the error for a language that failed."""
+    return {
+        language: {"profile": artifacts.put(result["profile"]), "pdf": artifacts.put(result["pdf"])}
+        if result["pdf"] else {"error": result["profile"]}
+        for language, result in results.items()
+    }
+
+
+def build_translations(story, job_description, languages, pdf_spec, force):
+    """Fan-out job: the CV in each extra language from one structured extraction."""
+    results = engine.generate_profiles(story, languages, job_description=job_description,
+                                       render=lambda text: render_pdf(text, pdf_spec), force=force)
+    return store_translations(results)
+
+
+def build_profiles(story, job_description, language, extra_languages, pdf_spec, force, basis):
+    """
+    Generation job when extra languages are picked: the main CV and every extra one come
+    from a single fan-out (one extraction, one translation per non-English language)
+    instead of a full generation plus a separate extraction.
+    """
+    results = engine.generate_profiles(story, [language, *extra_languages], job_description=job_description,
+                                       render=lambda text: render_pdf(text, pdf_spec), force=force)
+    main = results.pop(language)
+    if main["profile"].startswith("Error generating profile"):
+        raise RuntimeError(main["profile"])
+    return dict(store_profile(main["profile"], pdf_spec, basis), translations=store_translations(results))
+
+
+def finished_job(kind):
+    """This session's job of a kind once it has finished (and forgets it); None while running or absent."""
+    job_id = st.session_state.jobs.get(kind)
+    if job_id is None:
+        return None
+    job = jobs.get(job_id)
+    if job is not None and not job.finished:
+        return None
+    del st.session_state.jobs[kind]
+    return job
+
+
+def keep_translations(results):
+    """Shows the languages that failed and keeps the handles of the ones that worked."""
+    for name, result in results.items():
+        if "error" in result:
+            st.error(f"{name}: {result['error']}")
+    st.session_state.translations = {name: result for name, result in results.items() if "error" not in result}
+
+
+def watch(kind, show):
+    """
+    Draws show() for this session's running job of a kind and redraws it every POLL_SECONDS
+    as a fragment, so polling never reruns the whole script (audio hashing, ATS scoring).
+    Once the job has finished the whole app reruns once to pick up its result.
+    """
+    @st.fragment(run_every=POLL_SECONDS if kind in st.session_state.jobs else None)
+    def status():
+        job_id = st.session_state.jobs.get(kind)
+        if job_id is None:
+            return
+        job = jobs.get(job_id)
+        if job is None or job.finished:
+            st.rerun()
+        show(job)
+    status()
+
+
+def show_generation(running):
+    """What has streamed in so far, or what the running generation job is doing."""
+    if running.progress:
+        st.markdown(running.partial_text + " ▌")
+    elif running.kind == "sections":
+        st.info("Tailoring your skills and experience to the new job...")
+    elif running.kind == "fan_out":
+        st.info("Writing your CV in: " + ", ".join([language, *extra_languages]))
+    else:
+        st.info("Writing your CV...")
+
 # --- MAIN UI ---
 st.title(t["title"])
 st.subheader(t["subtitle"])
@@ -76,20 +235,28 @@ with col_up:
 
 audio_source = recorded_audio if recorded_audio else uploaded_audio
 if audio_source:
-    with st.spinner("Transcribing..."):
+    audio_key = JobExecutor.key("transcribe", read_audio(audio_source)[1], language)
+    if audio_key != st.session_state.transcribed_key and "transcribe" not in st.session_state.jobs:
         try:
-            st.session_state.transcribed_text = engine.transcribe_audio(
-                audio_source, 
-                lang_name=language 
-            )
-        except Exception as e:
-            st.error(f"Error transcribing: {e}")
+            st.session_state.jobs["transcribe"] = jobs.submit("transcribe", transcribe, audio_source, language, key=audio_key)
+        except QueueFullError:
+            st.warning(BUSY_MESSAGE)
+
+transcription = finished_job("transcribe")
+if transcription is not None:
+    if transcription.status == DONE:
+        st.session_state.story = transcription.result
+        st.session_state.transcribed_key = transcription.key
+    else:
+        st.error(f"Error transcribing: {transcription.error}")
+elif "transcribe" in st.session_state.jobs:
+    watch("transcribe", lambda job: st.info("Transcribing..."))
 
 # --- Step 2: Input Section ---
 st.write(f"### {t['step2']}")
 user_input = st.text_area(
     t["review_label"], 
-    value=st.session_state.transcribed_text, 
+    key="story",
     height=150,
     placeholder=t["placeholder_story"]
 )
@@ -97,6 +264,10 @@ user_input = st.text_area(
 # --- Step 3: Personalization ---
 st.write(f"### {t['step3']}")
 full_name = st.text_input(t["name_label"], placeholder="e.g. Sipho Khumalo")
+candidate_name = full_name if full_name else "Valued Candidate"
+extra_languages = st.multiselect("🌍 Also create my CV in:", [name for name in UI_TRANSLATIONS if name != language])
+low_data_pdf = st.checkbox("📶 Smaller PDF for mobile data", value=False)
+pdf_spec = (candidate_name, low_data_pdf)
 
 # --- Step 4: Target Job ---
 st.write(f"### {t['step4']}")
@@ -106,42 +277,149 @@ target_jd = st.text_area(
     placeholder=t["placeholder_jd"])
 
 generate_btn = st.button(t["gen_btn"])
+# Identical inputs are served from the profile cache; this asks Gemini for a new draft instead
+force_regenerate = st.checkbox("🔄 Fresh version (skip cache)", value=False) if st.session_state.profile_handle else False
 
 # --- Logic Execution ---
+profile_heading = f"### 📄 {t['review_label'].replace(':', '')}"
+
 if generate_btn and user_input:
-    with st.spinner("Engineering your professional profile..."):
+    basis = {"story": JobExecutor.key("story", user_input), "jd": JobExecutor.key("jd", target_jd), "language": language}
+    previous = st.session_state.profile_basis
+    # Only redo what changed: same story and JD needs no model call at all (a new name is
+    # picked up by the PDF re-render below), and a new JD only rewrites the JD-sensitive sections
+    incremental = (not force_regenerate and previous is not None and previous["story"] == basis["story"]
+                   and previous.get("language") == language
+                   and artifacts.get(st.session_state.profile_handle) is not None)
+    kind = None
+    if incremental and previous["jd"] == basis["jd"]:
+        st.success(f"🎊 {t['gen_btn'].replace('✨', '')} Success!")
+    else:
+        if incremental:
+            kind, fn, args = "sections", update_profile, (st.session_state.profile_handle, user_input, target_jd,
+                                                          language, pdf_spec, basis)
+        elif extra_languages:
+            kind, fn, args = "fan_out", build_profiles, (user_input, target_jd, language, tuple(extra_languages),
+                                                         pdf_spec, force_regenerate, basis)
+        else:
+            kind, fn, args = "generate", build_profile, (user_input, target_jd, language, pdf_spec, force_regenerate, basis)
+        try:
+            # A second click with the same inputs joins the running job instead of starting another
+            st.session_state.jobs["generate"] = jobs.submit(kind, fn, *args, key=JobExecutor.key(kind, *args))
+            if kind == "fan_out":
+                st.session_state.translations_spec = pdf_spec
+        except QueueFullError:
+            st.warning(BUSY_MESSAGE)
+
+    st.session_state.translations = {}
+    # A fan_out generation brings the extra languages back with the main CV
+    if extra_languages and kind != "fan_out":
+        args = (user_input, target_jd, tuple(extra_languages), pdf_spec, force_regenerate)
         try:
-            # 1. Generate text
-            profile_text = engine.generate_professional_profile(
-                user_input, 
-                job_description=target_jd
-            )
-            st.session_state.current_profile = profile_text
-            
-            # 2. Create PDF
-            pdf_bytes = create_pdf(profile_text, user_name=full_name if full_name else "Valued Candidate")
-            
-            if pdf_bytes:
-                st.session_state.pdf_data = pdf_bytes
-                st.balloons() 
-                st.success(f"🎊 {t['gen_btn'].replace('✨', '')} Success!")
-            else:
-                st.error("Text was generated, but PDF creation failed. Check logs.")
-                
-        except Exception as e:
-            st.error(f"Error during generation: {e}")
+            st.session_state.jobs["translate"] = jobs.submit("translate", build_translations, *args,
+                                                             key=JobExecutor.key("translate", *args))
+            st.session_state.translations_spec = pdf_spec
+        except QueueFullError:
+            st.warning(BUSY_MESSAGE)
+
+translation = finished_job("translate")
+if translation is not None:
+    if translation.status == DONE:
+        keep_translations(translation.result)
+    else:
+        st.error(f"Error during translation: {translation.error}")
+
+generation = finished_job("generate")
+if generation is not None:
+    if generation.status == DONE:
+        st.session_state.profile_handle = generation.result["profile"]
+        st.session_state.profile_basis = generation.result["basis"]
+        st.session_state.pdf_spec = generation.result["pdf_spec"]
+        if "translations" in generation.result:
+            keep_translations(generation.result["translations"])
+        if generation.result["pdf"]:
+            st.session_state.pdf_handle = generation.result["pdf"]
+            st.balloons()
+            st.success(f"🎊 {t['gen_btn'].replace('✨', '')} Success!")
+        else:
+            st.error("Text was generated, but PDF creation failed. Check logs.")
+    else:
+        st.error(f"Error during generation: {generation.error}")
 
 # --- DISPLAY ---
-if st.session_state.current_profile:
+# None once the store has expired the artifact; the user just generates again
+current_profile = artifacts.get(st.session_state.profile_handle)
+
+# The name only appears in the PDF header: a new name (or PDF size option) is a local re-render, never a model call
+if current_profile and "generate" not in st.session_state.jobs and st.session_state.pdf_spec != pdf_spec:
+    pdf_bytes = render_pdf(current_profile, pdf_spec)
+    if pdf_bytes:
+        st.session_state.pdf_handle = artifacts.put(pdf_bytes)
+        st.session_state.pdf_spec = pdf_spec
+if st.session_state.translations and "translate" not in st.session_state.jobs and st.session_state.translations_spec != pdf_spec:
+    for result in st.session_state.translations.values():
+        profile_text = artifacts.get(result["profile"])
+        pdf_bytes = render_pdf(profile_text, pdf_spec) if profile_text else None
+        if pdf_bytes:
+            result["pdf"] = artifacts.put(pdf_bytes)
+    st.session_state.translations_spec = pdf_spec
+pdf_data = artifacts.get(st.session_state.pdf_handle)
+
+if "generate" in st.session_state.jobs:
+    # Still generating: show what has streamed in so far; the fragment refreshes only this part
+    st.markdown("---")
+    st.markdown(profile_heading)
+    watch("generate", show_generation)
+elif current_profile:
     st.markdown("---")
-    st.markdown(f"### 📄 {t['review_label'].replace(':', '')}")
-    st.markdown(st.session_state.current_profile)
+    st.markdown(profile_heading)
+    st.markdown(to_markdown(parse_markdown(current_profile)))
+
+    # Local ATS check: no extra model call, just the JD's ranked keywords against the CV
+    if target_jd:
+        ats = score_profile(current_profile, extract_keywords(target_jd))
+        if ats["matched"] or ats["missing"]:
+            st.metric("🎯 ATS keyword coverage", f"{ats['score']:.0%}")
+            if ats["missing"]:
+                st.caption("Not yet covered: " + ", ".join(ats["missing"]))
     
-    if st.session_state.pdf_data:
+    if pdf_data:
         st.download_button(
             label="📥 Download Professional CV (PDF)",
-            data=st.session_state.pdf_data,
+            data=pdf_data,
             file_name=f"Ithuba_CV_{full_name.replace(' ', '_') if full_name else 'Candidate'}.pdf",
             mime="application/pdf",
             key="final_prod_download"
-        )
\ No newline at end of file
+        )
+
+if "translate" in st.session_state.jobs:
+    watch("translate", lambda job: st.info("Preparing your CV in: " + ", ".join(extra_languages)))
+for name, result in st.session_state.translations.items():
+    translated_pdf = artifacts.get(result["pdf"])
+    if translated_pdf:
+        st.download_button(
+            label=f"📥 {name} CV (PDF)",
+            data=translated_pdf,
+            file_name=f"Ithuba_CV_{full_name.replace(' ', '_') if full_name else 'Candidate'}_{name}.pdf",
+            mime="application/pdf",
+            key=f"download_{name}"
+        )
+
+# --- DEBUG TIMINGS (rendered last so it includes this run's spans) ---
+with st.sidebar:
+    if st.toggle("⏱ Debug timings", value=bool(os.getenv("ITHUBA_DEBUG"))):
+        st.dataframe(tracer.summary(), hide_index=True)
+        with st.expander("Jobs"):
+            st.json(jobs.stats())
+        with st.expander("Audio preprocessing"):
+            st.json(engine.audio_prep.stats())
+        with st.expander("Artifact store"):
+            st.json(artifacts.stats())
+        with st.expander("Rate limits"):
+            st.dataframe(limiter.stats(), hide_index=True)
+        with st.expander("Model routing"):
+            st.dataframe(engine.router.stats(), hide_index=True)
+        with st.expander("Recent spans"):
+            st.json(tracer.recent(15))
+        with st.expander("Prometheus"):
+            st.code(tracer.prometheus_text() + limiter.prometheus_text(), language="text")
@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark: what a fresh process (a Streamlit Cloud wake-up or a new batch
+worker) pays before it is useful. Each sample runs in its own interpreter so nothing
+is already imported.
+
+    python -m benchmarks.cold_start               # 5 fresh processes per measurement
+    python -m benchmarks.cold_start --runs 10
+
+  import_ms       import core.engine + IthubaEngine()
+  first_paint_ms  AppTest.from_file("app/main.py").run(), i.e. script import to first paint
+
+Also lists which heavy SDKs were loaded by first paint; with lazy loading only dotenv
+(read when the engine is constructed) should appear.
+Dummy API keys are used and the model health check is disabled, so no network is touched.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY_MODULES = ("groq", "google.generativeai", "fpdf", "dotenv")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from core.engine import IthubaEngine
+IthubaEngine()
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [m for m in %(heavy)r if m in sys.modules]}))
+"""
+
+_PAINT_PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(%(app)r, default_timeout=60).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [m for m in %(heavy)r if m in sys.modules],
+                  "exception": bool(at.exception)}))
+"""
+
+
+def _probe(source):
+    env = dict(os.environ, GROQ_API_KEY="bench", GEMINI_API_KEY="bench", ITHUBA_MODEL_HEALTH_CHECK="0")
+    output = subprocess.run([sys.executable, "-c", source], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_cold_start(runs=5):
+    probes = {
+        "import_ms": _IMPORT_PROBE % {"heavy": HEAVY_MODULES},
+        "first_paint_ms": _PAINT_PROBE % {"heavy": HEAVY_MODULES, "app": os.path.join(ROOT, "app", "main.py")},
+    }
+    result = {"runs": runs}
+    for name, source in probes.items():
+        samples = [_probe(source) for _ in range(runs)]
+        timings = [sample["ms"] for sample in samples]
+        result[name] = round(statistics.median(timings), 1)
+        result[f"{name}_min"] = round(min(timings), 1)
+        result[f"{name.rsplit('_', 1)[0]}_loaded"] = sorted(set().union(*(sample["loaded"] for sample in samples)))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start timings for a fresh Ithuba process.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(measure_cold_start(args.runs), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Local stand-ins for Groq Whisper and Gemini with configurable latency and failure rates.
+
+    with fake_providers(groq_latency=0.3, gemini_latency=1.2, failure_rate=0.05):
+        engine = IthubaEngine()          # or AppTest.from_file("app/main.py")
+
+Latencies are drawn from a lognormal around the configured mean so the tail looks
+like a real provider's, and a seeded RNG keeps runs comparable.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+from unittest import mock
+
+from core.render import SAMPLE_PROFILE
+
+
+class ProviderError(Exception):
+    """Raised by the fakes to simulate a provider-side failure (5xx / timeout)."""
+
+
+class _Latency:
+    def __init__(self, mean, failure_rate, seed, sigma=0.35):
+        self.mean = mean
+        self.failure_rate = failure_rate
+        self.sigma = sigma
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self, scale):
+        with self._lock:
+            self.calls += 1
+            delay = self._random.lognormvariate(0, self.sigma) * self.mean * scale if self.mean else 0.0
+            fail = self._random.random() < self.failure_rate
+        return delay, fail
+
+    def wait(self, scale=1.0):
+        delay, fail = self._draw(scale)
+        time.sleep(delay)
+        if fail:
+            raise ProviderError("503 simulated provider failure")
+
+    async def async_wait(self, scale=1.0):
+        delay, fail = self._draw(scale)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ProviderError("503 simulated provider failure")
+
+
+class FakeGroq:
+    """Shape-compatible with groq.Groq for audio.transcriptions.create."""
+
+    def __init__(self, latency=0.3, failure_rate=0.0, seed=1, transcript=None, **_):
+        self.latency = _Latency(latency, failure_rate, seed)
+        self.transcript = transcript or (
+            "I have run a spaza shop in Tembisa for six years. I order stock, handle cash, "
+            "deliver with my bakkie and trained two young people to work the till."
+        )
+        self.audio = self
+        self.transcriptions = self
+
+    def create(self, file, model, prompt, response_format="text"):
+        self.latency.wait()
+        return self.transcript
+
+
+class FakeAsyncGroq:
+    """Shape-compatible with groq.AsyncGroq; shares the transcript and call count of a FakeGroq."""
+
+    def __init__(self, groq):
+        self.groq = groq
+        self.audio = self
+        self.transcriptions = self
+
+    async def create(self, file, model, prompt, response_format="text"):
+        await self.groq.latency.async_wait()
+        return self.groq.transcript
+
+
+# What a JSON-mode call (extraction or translation) answers with
+SAMPLE_PROFILE_DATA = {
+    "summary": "Entrepreneurial retail operator with six years running a township spaza shop.",
+    "competencies": {"Operational": ["Inventory Management", "Cash Handling", "Last-mile Delivery"],
+                     "Management": ["Staff Training", "Supplier Relations"], "Technical": ["Point-of-Sale Systems"]},
+    "experience": ["Managed weekly stock ordering, reducing waste through demand-based purchasing",
+                   "Trained two junior staff members on till operation and customer service"],
+    "attributes": [{"name": "Resilience", "evidence": "Kept the business trading for six years"}],
+    "headings": {"summary": "Summary"},
+}
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Shape-compatible with genai.GenerativeModel for generate_content(_async), incl. stream=True."""
+
+    def __init__(self, model_name="gemini-fake", latency=1.0, failure_rate=0.0, seed=2,
+                 profile=SAMPLE_PROFILE, chunks=8, **_):
+        self.model_name = model_name
+        self.latency = _Latency(latency, failure_rate, seed)
+        self.profile = profile
+        self.chunks = chunks
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **_):
+        if not stream:
+            self.latency.wait()
+            return self._reply(generation_config)
+        return self._stream()
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **_):
+        if not stream:
+            await self.latency.async_wait()
+            return self._reply(generation_config)
+        return self._stream_async()
+
+    def _reply(self, generation_config):
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            # Distinct per call, so translations of different extractions do not share a cache entry
+            data = dict(SAMPLE_PROFILE_DATA, summary=f"{SAMPLE_PROFILE_DATA['summary']} ({self.latency.calls})")
+            return _Chunk(json.dumps(data))
+        return _Chunk(self.profile)
+
+    def _pieces(self):
+        step = max(1, len(self.profile) // self.chunks)
+        return [self.profile[start:start + step] for start in range(0, len(self.profile), step)]
+
+    def _stream(self):
+        # Time to first chunk is a fraction of the total, like a real streaming response
+        for piece in self._pieces():
+            self.latency.wait(scale=1.0 / self.chunks)
+            yield _Chunk(piece)
+
+    async def _stream_async(self):
+        for piece in self._pieces():
+            await self.latency.async_wait(scale=1.0 / self.chunks)
+            yield _Chunk(piece)
+
+
+@contextlib.contextmanager
+def fake_providers(groq_latency=0.3, gemini_latency=1.0, failure_rate=0.0, seed=1):
+    """Patches the provider SDK entry points so IthubaEngine, AsyncIthubaEngine and the Streamlit app run offline."""
+    groq = FakeGroq(latency=groq_latency, failure_rate=failure_rate, seed=seed)
+    models = {}
+
+    def make_model(name, **kwargs):
+        if name not in models:
+            models[name] = FakeGeminiModel(name, latency=gemini_latency, failure_rate=failure_rate, seed=seed + 1)
+        return models[name]
+
+    # The engine imports the SDKs lazily, so patch them where they are defined.
+    # No background health check: it would outlive the patches and reach the real API.
+    async_groq = FakeAsyncGroq(groq)
+    with mock.patch("groq.Groq", lambda **kwargs: groq), \
+            mock.patch("groq.AsyncGroq", lambda **kwargs: async_groq), \
+            mock.patch("google.generativeai.configure"), \
+            mock.patch("google.generativeai.GenerativeModel", make_model), \
+            mock.patch.dict(os.environ, {"ITHUBA_MODEL_HEALTH_CHECK": "0"}):
+        yield groq, models
@@ -0,0 +1,207 @@
+"""
+Offline benchmark suite for the CV pipeline. No API keys or network needed: Groq and
+Gemini are replaced by the latency/failure-injecting fakes in benchmarks/fakes.py.
+
+    python -m benchmarks.run                      # run and compare against saved baselines
+    python -m benchmarks.run --save-baseline      # record the current numbers as the baseline
+    python -m benchmarks.run --only redact,pdf --iterations 200
+
+Each scenario reports p50/p95/p99 latency, throughput, failures and peak traced memory.
+A scenario regresses when p95 grows, or throughput drops, by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from benchmarks.fakes import fake_providers
+from core.audio import AudioPreprocessor, encode_wav
+from core.redaction import SAMPLE_TRANSCRIPT, redact
+from core.render import SAMPLE_PROFILE
+from core.utils import create_pdf
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "main.py")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(name, call, iterations, concurrency=1, is_failure=lambda result: False, memory_probes=3):
+    """
+    Runs call(i) iterations times on `concurrency` threads and summarises the latencies.
+    Peak memory comes from a few separate traced calls; tracemalloc would skew the timings.
+    """
+    latencies = []
+    failures = 0
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            failed = is_failure(call(i))
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    timed(-1)  # warm-up: imports, parse caches, first AppTest script compile
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, failed in pool.map(timed, range(iterations)):
+            latencies.append(latency)
+            failures += failed
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(memory_probes):
+        tracemalloc.reset_peak()
+        timed(iterations + i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_per_s": round(iterations / wall, 2),
+        "failures": failures,
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def _recorder_wav(seconds=10, rate=44100):
+    """Stereo 44.1 kHz WAV like audio_recorder produces: speech-band tone with a lead-in and long pauses."""
+    import numpy as np
+    t = np.arange(int(rate * seconds)) / rate
+    envelope = ((t % 4) > 1.5) & (t > 1.0)  # 2.5 s talking, 1.5 s pause
+    mono = (np.sin(2 * np.pi * 220 * t) * 8000 * envelope).astype(np.int16)
+    return encode_wav(np.repeat(mono, 2).tobytes(), rate, 2, 2)
+
+
+def _errored(result):
+    return isinstance(result, str) and result.startswith("Error")
+
+
+def scenarios(args):
+    from core.engine import IthubaEngine
+
+    audio_prep = AudioPreprocessor()
+    recording = _recorder_wav()
+
+    def engine_scenarios(engine):
+        # Distinct payloads/stories per iteration so the caches measure provider cost, not hits
+        yield "transcribe", lambda i: engine.transcribe_audio(b"RIFF%dWAVE" % i), args.concurrency, _errored
+        yield "audio_prep", lambda i: audio_prep.process("audio.wav", recording), 1, lambda r: r.payload is recording
+        yield "redact", lambda i: redact(SAMPLE_TRANSCRIPT), 1, lambda r: False
+        yield "generate", lambda i: engine.generate_professional_profile(
+            f"{SAMPLE_TRANSCRIPT} ({i})", job_description="Retail supervisor, stock control, cash handling"
+        ), args.concurrency, _errored
+        # English + two home languages: one extraction and two translations instead of three full generations
+        yield "fan_out", lambda i: engine.generate_profiles(
+            f"{SAMPLE_TRANSCRIPT} ({i})", ["English", "Sepedi", "isiZulu"], user_name=f"Candidate {i}"
+        ), args.concurrency, lambda r: any(result["pdf"] is None for result in r.values())
+        yield "pdf", lambda i: create_pdf(SAMPLE_PROFILE, user_name=f"Candidate {i}"), 1, lambda r: r is None
+
+        def pipeline(i):
+            transcript = engine.transcribe_audio(b"RIFF-pipeline-%dWAVE" % i)
+            if _errored(transcript):
+                return transcript
+            profile = engine.generate_professional_profile(engine.redact_pii(transcript) + f" ({i})")
+            if _errored(profile):
+                return profile
+            return create_pdf(profile, user_name="Pipeline Candidate")
+
+        yield "pipeline", pipeline, args.concurrency, lambda r: r is None or _errored(r)
+
+    with fake_providers(args.groq_latency, args.gemini_latency, args.failure_rate):
+        engine = IthubaEngine()
+        for name, call, concurrency, is_failure in engine_scenarios(engine):
+            if args.only and name not in args.only:
+                continue
+            yield measure(name, call, args.iterations, concurrency, is_failure)
+
+        if not args.only or "apptest" in args.only:
+            yield measure("apptest", _apptest_run, max(1, args.iterations // 10), 1, lambda ok: not ok, memory_probes=1)
+
+
+def _apptest_run(i):
+    """One full UI pass: load the app, type a story and JD, press Generate, wait for the PDF."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    at.text_area[0].set_value(f"{SAMPLE_TRANSCRIPT} ({i})")
+    at.text_area[1].set_value("Retail supervisor: stock control, cash handling, customer service.")
+    at.text_input[0].set_value("Thandi Nkosi")
+    at.button[0].click().run()
+    # The app polls jobs from a fragment, which AppTest does not rerun on its own
+    deadline = time.perf_counter() + 60
+    while at.session_state.jobs and time.perf_counter() < deadline:
+        time.sleep(0.05)
+        at.run()
+    return not at.exception and at.session_state.pdf_handle is not None
+
+
+def compare(result, baseline, tolerance):
+    problems = []
+    if baseline.get("p95_ms") and result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+        problems.append(f"p95 {baseline['p95_ms']}ms -> {result['p95_ms']}ms")
+    if baseline.get("throughput_per_s") and result["throughput_per_s"] < baseline["throughput_per_s"] * (1 - tolerance):
+        problems.append(f"throughput {baseline['throughput_per_s']}/s -> {result['throughput_per_s']}/s")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Ithuba pipeline.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads for provider-bound scenarios")
+    parser.add_argument("--groq-latency", type=float, default=0.05, help="Mean fake Whisper latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Mean fake Gemini latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--only", type=lambda s: set(s.split(",")), default=None,
+                        help="Comma-separated: transcribe,audio_prep,redact,generate,fan_out,pdf,pipeline,apptest")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    regressions = []
+    print(f"{'scenario':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'fail':>6}{'peak KB':>10}")
+    for result in scenarios(args):
+        print(f"{result['scenario']:<12}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['throughput_per_s']:>10.2f}{result['failures']:>6}{result['peak_mem_kb']:>10.1f}")
+
+        path = os.path.join(BASELINE_DIR, f"{result['scenario']}.json")
+        if args.save_baseline:
+            with open(path, "w") as f:
+                json.dump(result, f, indent=2)
+        elif os.path.exists(path):
+            with open(path) as f:
+                problems = compare(result, json.load(f), args.tolerance)
+            regressions.extend(f"{result['scenario']}: {p}" for p in problems)
+
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
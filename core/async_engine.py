@@ -0,0 +1,157 @@
+import asyncio
+import os
+
+import httpx
+
+from core.audio import AudioPreprocessor
+from core.cache import ProfileCache, TranscriptionCache
+from core.engine import (
+    BaseEngine, init_llm, load_env, load_model_choice, model_key, prepare_job_description, read_audio,
+)
+from core.ratelimit import limiter
+
+
+class AsyncIthubaEngine(BaseEngine):
+    """
+    asyncio counterpart of IthubaEngine. All Groq calls share one pooled HTTP client,
+    and a semaphore caps how many provider calls are in flight at once, so many
+    sessions can share a single event loop instead of one thread per request.
+
+    An instance belongs to the event loop it is first used on.
+    """
+
+    def __init__(self, max_concurrency=8, max_connections=32, timeout=120.0):
+        from groq import AsyncGroq
+
+        load_env()
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        # Retried in core.ratelimit (transient=True covers what the SDK's own retries did)
+        self.groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=self._http, max_retries=0)
+        self.transcription_cache = TranscriptionCache.from_env()
+        self.audio_prep = AudioPreprocessor.from_env()
+        self.profile_cache = ProfileCache.from_env()
+        # Gemini's async path reuses the gRPC aio channel owned by the client init_llm configures
+        self.llm, self.model_name = init_llm(preferred=load_model_choice())
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def transcribe_audio(self, audio_data, lang_name="English"):
+        """Handles both uploaded files and live recorded bytes via Groq Whisper-v3."""
+
+        sa_prompt = self._transcription_prompt(lang_name)
+        try:
+            filename, payload = read_audio(audio_data)
+
+            cache_key = self.transcription_cache.key(payload, sa_prompt)
+            cached = self.transcription_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            if self.audio_prep is not None:
+                # numpy work: off the event loop so other sessions keep streaming meanwhile
+                prepared = await asyncio.to_thread(self.audio_prep.process, filename, payload)
+                filename, payload = prepared.filename, prepared.payload
+
+            async def request():
+                async with self._semaphore:
+                    return await self.groq_client.audio.transcriptions.create(
+                        file=(filename, payload),
+                        model="whisper-large-v3",
+                        prompt=sa_prompt,
+                        response_format="text"
+                    )
+
+            # Waiting for a rate-limit slot does not hold a semaphore slot
+            transcription = await limiter.acall("groq", "whisper-large-v3", request, transient=True)
+            self.transcription_cache.put(cache_key, transcription)
+            return transcription
+        except Exception as e:
+            return f"Error transcribing audio: {e}"
+
+    async def generate_professional_profile(self, raw_text, target_language="English", job_description="", force=False):
+        """Async version of IthubaEngine.generate_professional_profile."""
+        clean_text, job_description = self._profile_inputs(raw_text, job_description)
+        return await self._generate(clean_text, target_language, job_description, force)
+
+    async def _generate(self, clean_text, target_language, job_description, force):
+        cache_key = self.profile_cache.key(clean_text, job_description, target_language, self.model_name)
+        cached = self.profile_cache.get(cache_key, force=force)
+        if cached is not None:
+            return cached
+
+        system_prompt = self._build_profile_prompt(clean_text, target_language, job_description)
+
+        try:
+
+            async def request():
+                async with self._semaphore:
+                    return await self.llm.generate_content_async(system_prompt)
+
+            response = await limiter.acall("gemini", model_key(self.llm), request)
+            self.profile_cache.put(cache_key, response.text)
+            return response.text
+        except Exception as e:
+            return f"Error generating profile: {e}"
+
+    async def stream_professional_profile(self, raw_text, target_language="English", job_description="", force=False):
+        """Async generator of markdown chunks; raises on failure, see IthubaEngine.stream_professional_profile."""
+        clean_text, job_description = self._profile_inputs(raw_text, job_description)
+        cache_key = self.profile_cache.key(clean_text, job_description, target_language, self.model_name)
+        cached = self.profile_cache.get(cache_key, force=force)
+        if cached is not None:
+            yield cached
+            return
+
+        system_prompt = self._build_profile_prompt(clean_text, target_language, job_description)
+
+        parts = []
+
+        async def request():
+            # Taken here, not around acall, so waiting for a rate-limit slot does not hold it
+            await self._semaphore.acquire()
+            try:
+                return await self.llm.generate_content_async(system_prompt, stream=True)
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+        response = await limiter.acall("gemini", model_key(self.llm), request)
+        try:
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue
+                if text:
+                    parts.append(text)
+                    yield text
+        finally:
+            self._semaphore.release()
+        if parts:
+            self.profile_cache.put(cache_key, "".join(parts))
+
+    async def build_profile(self, audio_data, lang_name="English", target_language="English", job_description=""):
+        """
+        Full voice-note-to-profile run. Job description keyword extraction takes well
+        under a millisecond, so it runs inline; a worker thread would cost more than it overlaps.
+
+        Returns a dict with 'transcript' and 'profile' (None if transcription failed).
+        """
+        prepared_jd = prepare_job_description(job_description)
+        transcript = await self.transcribe_audio(audio_data, lang_name=lang_name)
+        if transcript.startswith("Error transcribing audio"):
+            return {"transcript": transcript, "profile": None}
+
+        profile = await self._generate(self._clean_story(transcript), target_language, prepared_jd, False)
+        return {"transcript": transcript, "profile": profile}
@@ -0,0 +1,174 @@
+"""
+Local ATS (Applicant Tracking System) matching.
+
+A precomputed index of skills and industry terms, including South African
+informal-economy vocabulary, is compiled once into a single regex. It is used to:
+  - pull ranked keywords out of a job description, so only those reach the prompt;
+  - score a generated profile against them without another model call;
+  - suggest professional phrasing for informal terms found in a story.
+"""
+import re
+from collections import Counter, namedtuple
+
+Keyword = namedtuple("Keyword", "term category score")
+
+# term -> (category, weight). Weights favour hard skills ATS filters screen on.
+SKILL_INDEX = {
+    # Operational
+    "customer service": ("Operational", 1.5), "stock control": ("Operational", 1.5),
+    "inventory management": ("Operational", 1.5), "inventory": ("Operational", 1.0),
+    "cash handling": ("Operational", 1.5), "point of sale": ("Operational", 1.2),
+    "merchandising": ("Operational", 1.2), "retail": ("Operational", 1.0),
+    "sales": ("Operational", 1.0), "direct sales": ("Operational", 1.3),
+    "logistics": ("Operational", 1.3), "deliveries": ("Operational", 1.0),
+    "delivery": ("Operational", 1.0), "warehouse": ("Operational", 1.0),
+    "forklift": ("Operational", 1.5), "procurement": ("Operational", 1.3),
+    "quality control": ("Operational", 1.4), "health and safety": ("Operational", 1.4),
+    "food safety": ("Operational", 1.4), "food preparation": ("Operational", 1.2),
+    "cooking": ("Operational", 1.0), "catering": ("Operational", 1.2),
+    "cleaning": ("Operational", 1.0), "hygiene": ("Operational", 1.0),
+    "maintenance": ("Operational", 1.2), "repairs": ("Operational", 1.0),
+    "security": ("Operational", 1.0), "access control": ("Operational", 1.3),
+    "driving": ("Operational", 1.0), "route planning": ("Operational", 1.3),
+    "scheduling": ("Operational", 1.2), "record keeping": ("Operational", 1.2),
+    "data capturing": ("Operational", 1.3), "data entry": ("Operational", 1.3),
+    "reception": ("Operational", 1.0), "admin": ("Operational", 0.8),
+    "administration": ("Operational", 1.0), "filing": ("Operational", 0.8),
+    "childcare": ("Operational", 1.2), "caregiving": ("Operational", 1.2),
+    "agriculture": ("Operational", 1.0), "farming": ("Operational", 1.0),
+    "landscaping": ("Operational", 1.0), "construction": ("Operational", 1.0),
+    "bricklaying": ("Operational", 1.3), "plumbing": ("Operational", 1.3),
+    "welding": ("Operational", 1.4), "carpentry": ("Operational", 1.3),
+    "painting": ("Operational", 0.8), "tiling": ("Operational", 1.2),
+    "sewing": ("Operational", 1.2), "hairdressing": ("Operational", 1.3),
+    # Management
+    "team leadership": ("Management", 1.5), "supervision": ("Management", 1.3),
+    "supervisor": ("Management", 1.2), "team management": ("Management", 1.5),
+    "project management": ("Management", 1.5), "budgeting": ("Management", 1.4),
+    "bookkeeping": ("Management", 1.4), "financial management": ("Management", 1.4),
+    "cash flow": ("Management", 1.3), "training": ("Management", 1.0),
+    "mentoring": ("Management", 1.0), "negotiation": ("Management", 1.3),
+    "stakeholder management": ("Management", 1.4), "conflict resolution": ("Management", 1.3),
+    "problem solving": ("Management", 1.1), "time management": ("Management", 1.1),
+    "communication": ("Management", 0.9), "teamwork": ("Management", 0.9),
+    "leadership": ("Management", 1.1), "planning": ("Management", 0.9),
+    "reporting": ("Management", 1.0), "compliance": ("Management", 1.2),
+    "entrepreneurship": ("Management", 1.2), "small business": ("Management", 1.1),
+    "community engagement": ("Management", 1.2), "relationship management": ("Management", 1.3),
+    # Technical
+    "microsoft office": ("Technical", 1.4), "excel": ("Technical", 1.4),
+    "word processing": ("Technical", 1.1), "computer literacy": ("Technical", 1.2),
+    "email": ("Technical", 0.8), "social media": ("Technical", 1.1),
+    "digital marketing": ("Technical", 1.3), "pos system": ("Technical", 1.3),
+    "sap": ("Technical", 1.4), "pastel": ("Technical", 1.4), "payroll": ("Technical", 1.3),
+    "mobile money": ("Technical", 1.1), "electrical": ("Technical", 1.3),
+    "mechanical": ("Technical", 1.2), "motor mechanic": ("Technical", 1.4),
+    "auto electrician": ("Technical", 1.4), "diesel mechanic": ("Technical", 1.4),
+    "code 10": ("Technical", 1.5), "code 14": ("Technical", 1.5),
+    "code 8": ("Technical", 1.4), "drivers licence": ("Technical", 1.4),
+    "driver's licence": ("Technical", 1.4), "pdp": ("Technical", 1.4),
+    "first aid": ("Technical", 1.3), "matric": ("Technical", 1.2),
+    "nqf": ("Technical", 1.2), "bilingual": ("Technical", 1.0),
+}
+
+# Informal-economy vocabulary -> the professional phrasing recruiters and ATS filters expect
+INFORMAL_TERMS = {
+    "spaza": "Retail Operations & Stock Management",
+    "tuck shop": "Retail Operations & Stock Management",
+    "bakkie": "Light Commercial Vehicle Logistics",
+    "piece-work": "Contract & Project-Based Work",
+    "piece work": "Contract & Project-Based Work",
+    "stokvel": "Community Savings Scheme Administration",
+    "taxi rank": "Passenger Transport Operations",
+    "taxi": "Passenger Transport Operations",
+    "hawker": "Direct Sales & Street Retail",
+    "street vendor": "Direct Sales & Street Retail",
+    "shebeen": "Hospitality & Beverage Service Management",
+    "braai": "Food Preparation & Catering",
+    "car wash": "Vehicle Valeting & Customer Service",
+    "domestic work": "Household Management",
+    "gardening": "Grounds Maintenance & Landscaping",
+    "mechanic": "Motor Vehicle Maintenance",
+    "vetkoek": "Food Production & Sales",
+    "kota": "Food Production & Sales",
+    "creche": "Early Childhood Care",
+    "car guard": "Security & Parking Management",
+    "cell phone repairs": "Electronics Repair",
+    "hair salon": "Hairdressing & Client Services",
+    "seamstress": "Garment Production & Alterations",
+    "recycling": "Waste Sorting & Recycling Operations",
+}
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can candidate candidates
+company could do does each for from has have having he her his how if in into is it its job
+may must no not of on or our own per please position role she should so such than that the
+their them there these they this those to under up us was we well were what when where which
+while who will with within would you your years year experience required requirements minimum
+ability able strong good excellent work working apply applicants including ensure duties
+responsible responsibilities preferred advantage skills knowledge team new etc
+""".split())
+
+_WORD = re.compile(r"[a-z][a-z0-9'+-]{2,}")
+
+
+def _normalise(text):
+    return " ".join(text.lower().replace("-", " ").split())
+
+
+def _compile(terms):
+    # Longest first so "inventory management" wins over "inventory" at the same position
+    ordered = sorted((_normalise(term) for term in terms), key=len, reverse=True)
+    return re.compile(r"(?<![a-z0-9])(?:" + "|".join(re.escape(t) for t in ordered) + r")(?![a-z0-9])")
+
+
+_INDEX_NORMALISED = {_normalise(term): value for term, value in SKILL_INDEX.items()}
+_INFORMAL_NORMALISED = {_normalise(term): value for term, value in INFORMAL_TERMS.items()}
+_INDEX_PATTERN = _compile(list(SKILL_INDEX) + list(INFORMAL_TERMS))
+_INFORMAL_PATTERN = _compile(INFORMAL_TERMS)
+
+
+def extract_keywords(job_description, top_n=15):
+    """
+    Ranked keywords for a job description: indexed terms scored by frequency x weight,
+    then frequently repeated unindexed words at a lower weight.
+    """
+    text = _normalise(job_description or "")
+    if not text:
+        return []
+
+    scores = Counter()
+    categories = {}
+    for match in _INDEX_PATTERN.finditer(text):
+        term = match.group()
+        category, weight = _INDEX_NORMALISED.get(term, ("Operational", 1.0))
+        scores[term] += weight
+        categories[term] = category
+
+    covered = set(" ".join(scores).split())
+    for word, count in Counter(_WORD.findall(text)).items():
+        if count >= 2 and word not in STOPWORDS and word not in covered:
+            scores[word] += 0.5 * count
+            categories[word] = "Other"
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_n]
+    return [Keyword(term, categories[term], round(score, 2)) for term, score in ranked]
+
+
+def score_profile(profile_text, keywords):
+    """Share of keywords that appear in the profile, with matched and missing terms."""
+    terms = [k.term if isinstance(k, Keyword) else _normalise(k) for k in keywords]
+    if not terms:
+        return {"score": 0.0, "matched": [], "missing": []}
+    text = _normalise(profile_text or "")
+    matched = [t for t in terms if re.search(r"(?<![a-z0-9])" + re.escape(t) + r"(?![a-z0-9])", text)]
+    missing = [t for t in terms if t not in matched]
+    return {"score": round(len(matched) / len(terms), 3), "matched": matched, "missing": missing}
+
+
+def professional_terms(story):
+    """Informal terms in a story mapped to their professional phrasing, in order of appearance."""
+    found = {}
+    for match in _INFORMAL_PATTERN.finditer(_normalise(story or "")):
+        found.setdefault(match.group(), _INFORMAL_NORMALISED[match.group()])
+    return found
@@ -0,0 +1,344 @@
+import io
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+WINDOW_SECONDS = 0.03
+FFMPEG_RATE = 16000
+_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+# Whisper resamples everything to 16 kHz mono; anything more is upload the provider throws away
+SPEECH_RATE = 16000
+# ffmpeg arguments per compact upload format (all accepted by Groq's Whisper endpoint)
+CODECS = {
+    "flac": ("flac", ["-c:a", "flac"]),
+    "ogg": ("ogg", ["-c:a", "libopus", "-b:a", "24k"]),
+}
+
+Prepared = namedtuple("Prepared", "filename payload input_bytes output_bytes input_seconds output_seconds")
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def audio_size(audio_data):
+    """Size in bytes of recorded bytes, a Streamlit upload or a path-backed file, without reading it."""
+    if isinstance(audio_data, bytes):
+        return len(audio_data)
+    if getattr(audio_data, "size", None) is not None:
+        return audio_data.size
+    if getattr(audio_data, "path", None):
+        return os.path.getsize(audio_data.path)
+    return None
+
+
+def open_audio_stream(audio_data):
+    """Returns (filename, binary stream) positioned at the start of the audio."""
+    if isinstance(audio_data, bytes):
+        return "audio.wav", io.BytesIO(audio_data)
+    if getattr(audio_data, "path", None):
+        return audio_data.name, open(audio_data.path, "rb")
+    audio_data.seek(0)
+    return audio_data.name, audio_data
+
+
+def _wav_blocks(stream):
+    reader = wave.open(stream, "rb")
+    params = (reader.getframerate(), reader.getnchannels(), reader.getsampwidth())
+    block_frames = max(1, int(reader.getframerate() * WINDOW_SECONDS))
+
+    def blocks():
+        try:
+            while True:
+                data = reader.readframes(block_frames)
+                if not data:
+                    break
+                yield data
+        finally:
+            reader.close()
+
+    return params, blocks()
+
+
+def _ffmpeg_blocks(stream):
+    """Decodes any container ffmpeg understands to 16 kHz mono PCM without buffering the whole file."""
+    if shutil.which("ffmpeg") is None:
+        raise AudioDecodeError("ffmpeg is required to split compressed audio (mp3/m4a).")
+
+    proc = subprocess.Popen(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(FFMPEG_RATE), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+
+    def feed():
+        try:
+            while True:
+                chunk = stream.read(1024 * 1024)
+                if not chunk:
+                    break
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    threading.Thread(target=feed, daemon=True).start()
+    block_bytes = int(FFMPEG_RATE * WINDOW_SECONDS) * 2
+
+    def blocks():
+        try:
+            while True:
+                data = proc.stdout.read(block_bytes)
+                if not data:
+                    break
+                yield data
+        finally:
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise AudioDecodeError("ffmpeg could not decode the recording.")
+
+    return (FFMPEG_RATE, 1, 2), blocks()
+
+
+def _window_energy(data, channels, sample_width):
+    dtype = _DTYPES.get(sample_width)
+    if dtype is None:
+        return None
+    samples = np.frombuffer(data, dtype=dtype).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128.0
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    if not len(samples):
+        return 0.0
+    # Normalise to a 16-bit scale so one threshold works for every sample width
+    scale = 2 ** (8 * sample_width - 16)
+    return float(np.sqrt(np.mean(samples ** 2))) / scale
+
+
+def encode_wav(pcm, sample_rate, channels, sample_width):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def split_segments(stream, max_seconds=60, min_seconds=20,
+                   silence_threshold=500, min_silence_seconds=0.3):
+    """
+    Yields WAV-encoded segments of at most max_seconds, cutting inside a pause once a
+    segment is at least min_seconds long. Only one segment is held in memory at a time,
+    and segments that are silence throughout are dropped.
+    """
+    # Sniff the header rather than trusting the extension; recorder bytes arrive unnamed
+    header = stream.read(12)
+    stream.seek(0)
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        (rate, channels, width), blocks = _wav_blocks(stream)
+    else:
+        (rate, channels, width), blocks = _ffmpeg_blocks(stream)
+
+    bytes_per_second = rate * channels * width
+    max_bytes = int(max_seconds * bytes_per_second)
+    min_bytes = int(min_seconds * bytes_per_second)
+    silence_bytes_needed = int(min_silence_seconds * bytes_per_second)
+
+    current = bytearray()
+    silent_run = 0
+    voiced = False
+    for block in blocks:
+        current += block
+        energy = _window_energy(block, channels, width)
+        if energy is not None and energy < silence_threshold:
+            silent_run += len(block)
+        else:
+            silent_run = 0
+            voiced = True
+
+        if (len(current) >= min_bytes and silent_run >= silence_bytes_needed) or len(current) >= max_bytes:
+            if voiced:
+                yield encode_wav(bytes(current), rate, channels, width)
+            current = bytearray()
+            silent_run = 0
+            voiced = False
+
+    if current and voiced:
+        yield encode_wav(bytes(current), rate, channels, width)
+
+
+def _is_wav(payload):
+    return payload[:4] == b"RIFF" and payload[8:12] == b"WAVE"
+
+
+def _decode_pcm(payload):
+    """(rate, channels, sample_width, pcm bytes) for a WAV, or anything ffmpeg decodes; None otherwise."""
+    if _is_wav(payload):
+        with wave.open(io.BytesIO(payload), "rb") as reader:
+            return reader.getframerate(), reader.getnchannels(), reader.getsampwidth(), reader.readframes(reader.getnframes())
+    if shutil.which("ffmpeg") is None:
+        return None
+    (rate, channels, width), blocks = _ffmpeg_blocks(io.BytesIO(payload))
+    return rate, channels, width, b"".join(blocks)
+
+
+def _to_mono(pcm, channels, sample_width):
+    """Float samples on a 16-bit scale, channels averaged."""
+    samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % (channels * sample_width)], dtype=_DTYPES[sample_width])
+    samples = samples.astype(np.float32)
+    if sample_width == 1:
+        samples -= 128.0
+    samples /= 2 ** (8 * sample_width - 16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def resample(samples, rate, target_rate=SPEECH_RATE):
+    if rate == target_rate or not len(samples):
+        return samples
+    if rate > target_rate:
+        # Box filter over one output period so content above the new Nyquist is not folded back in
+        width = int(round(rate / target_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode="same")
+    count = int(len(samples) * target_rate / rate)
+    return np.interp(np.arange(count) * (rate / target_rate), np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples, rate, threshold=500, max_pause=0.6, padding=0.2):
+    """
+    Energy VAD over WINDOW_SECONDS windows: drops silence before the first and after the
+    last voiced window (keeping padding seconds), and shortens pauses longer than
+    max_pause to max_pause. Audio with no voiced window is returned unchanged.
+    """
+    window = max(1, int(rate * WINDOW_SECONDS))
+    count = len(samples) // window
+    if not count:
+        return samples
+    frames = samples[: count * window].reshape(count, window)
+    voiced = np.sqrt(np.mean(frames ** 2, axis=1)) >= threshold
+    if not voiced.any():
+        return samples
+
+    keep = np.zeros(count, dtype=bool)
+    pad = int(round(padding / WINDOW_SECONDS))
+    first, last = np.flatnonzero(voiced)[[0, -1]]
+    keep[max(0, first - pad): last + pad + 1] = True
+    # Keep each end of a long pause so words are not clipped and Whisper still hears a break
+    half_pause = max(1, int(round(max_pause / WINDOW_SECONDS / 2)))
+    index = first
+    while index <= last:
+        if voiced[index]:
+            index += 1
+            continue
+        end = index
+        while end <= last and not voiced[end]:
+            end += 1
+        if end - index > 2 * half_pause:
+            keep[index + half_pause: end - half_pause] = False
+        index = end
+
+    kept = frames[keep].reshape(-1)
+    if last + pad + 1 >= count:
+        kept = np.concatenate([kept, samples[count * window:]])
+    return kept
+
+
+def _encode_compact(wav_bytes, codec):
+    extension, args = CODECS[codec]
+    result = subprocess.run(["ffmpeg", "-loglevel", "error", "-i", "pipe:0", *args, "-f", extension, "pipe:1"],
+                            input=wav_bytes, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        raise AudioDecodeError(f"ffmpeg could not encode {codec}.")
+    return extension, result.stdout
+
+
+class AudioPreprocessor:
+    """
+    Shrinks a recording before it is uploaded for transcription: downmix to mono,
+    resample to 16 kHz, trim silence at the edges and in long pauses, and optionally
+    encode to FLAC or Opus (needs ffmpeg; WAV otherwise). If the result is not
+    smaller, or the audio cannot be decoded, the original bytes are sent.
+    """
+
+    def __init__(self, target_rate=SPEECH_RATE, silence_threshold=500, max_pause=0.6, padding=0.2,
+                 codec="wav", enabled=True):
+        self.target_rate = target_rate
+        self.silence_threshold = silence_threshold
+        self.max_pause = max_pause
+        self.padding = padding
+        self.codec = codec if codec in CODECS else "wav"
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._totals = {"calls": 0, "skipped": 0, "input_bytes": 0, "output_bytes": 0,
+                        "input_seconds": 0.0, "output_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            silence_threshold=float(os.getenv("ITHUBA_VAD_THRESHOLD", "500")),
+            max_pause=float(os.getenv("ITHUBA_VAD_MAX_PAUSE", "0.6")),
+            codec=os.getenv("ITHUBA_AUDIO_CODEC", "wav"),
+            enabled=os.getenv("ITHUBA_AUDIO_PREPROCESS", "1") != "0",
+        )
+
+    def process(self, filename, payload):
+        """Returns Prepared(filename, payload, ...) ready to upload; seconds are None if not decoded."""
+        prepared = Prepared(filename, payload, len(payload), len(payload), None, None)
+        if self.enabled:
+            try:
+                prepared = self._process(filename, payload) or prepared
+            except (AudioDecodeError, EOFError, wave.Error, ValueError) as e:
+                print(f"Audio preprocessing skipped for {filename}: {e}")
+        with self._lock:
+            self._totals["calls"] += 1
+            self._totals["skipped"] += prepared.payload is payload
+            self._totals["input_bytes"] += prepared.input_bytes
+            self._totals["output_bytes"] += prepared.output_bytes
+            self._totals["input_seconds"] += prepared.input_seconds or 0.0
+            self._totals["output_seconds"] += prepared.output_seconds or 0.0
+        return prepared
+
+    def _process(self, filename, payload):
+        if self.codec == "wav" and not _is_wav(payload):
+            # 16 kHz PCM is larger than any compressed upload, so decoding it would be wasted work
+            return None
+        decoded = _decode_pcm(payload)
+        if decoded is None or decoded[2] not in _DTYPES:
+            return None
+        rate, channels, width, pcm = decoded
+        samples = _to_mono(pcm, channels, width)
+        input_seconds = len(samples) / rate
+        samples = trim_silence(resample(samples, rate, self.target_rate), self.target_rate,
+                               self.silence_threshold, self.max_pause, self.padding)
+        pcm = np.clip(np.round(samples), -32768, 32767).astype(np.int16).tobytes()
+        output = encode_wav(pcm, self.target_rate, 1, 2)
+        extension = "wav"
+        if self.codec != "wav" and shutil.which("ffmpeg"):
+            extension, output = _encode_compact(output, self.codec)
+        if len(output) >= len(payload):
+            return None
+        name = f"{os.path.splitext(filename)[0]}.{extension}"
+        return Prepared(name, output, len(payload), len(output), input_seconds, len(samples) / self.target_rate)
+
+    def stats(self):
+        with self._lock:
+            totals = dict(self._totals)
+        totals["bytes_saved"] = totals["input_bytes"] - totals["output_bytes"]
+        totals["saved_ratio"] = round(totals["bytes_saved"] / totals["input_bytes"], 3) if totals["input_bytes"] else 0.0
+        totals["input_seconds"] = round(totals["input_seconds"], 1)
+        totals["output_seconds"] = round(totals["output_seconds"], 1)
+        totals["codec"] = self.codec
+        return totals
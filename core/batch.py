@@ -0,0 +1,230 @@
+"""
+Headless batch pipeline: a folder (or manifest) of voice notes in, a folder of CV PDFs out.
+
+    python -m core.batch --input cohort/ --output cvs/ --workers 4
+    python -m core.batch --manifest cohort.csv --output cvs/
+
+A manifest is a CSV with an 'audio' column and optional 'name' and 'job_description'
+columns ('job_description' may be the text itself or a path to a .txt file).
+Each finished candidate is appended to <output>/results.jsonl; re-running with the
+same output directory skips every candidate already recorded as 'ok'.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.engine import IthubaEngine
+from core.utils import create_pdf
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a")
+STAGES = ("transcribe", "redact", "generate", "pdf")
+RESULTS_FILE = "results.jsonl"
+
+
+class BatchFile:
+    """Minimal file-like wrapper so transcribe_audio sees the same shape as a Streamlit upload."""
+
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def _read_text_or_file(value, base_dir):
+    if not value:
+        return ""
+    path = value if os.path.isabs(value) else os.path.join(base_dir, value)
+    if value.lower().endswith(".txt") and os.path.isfile(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return value
+
+
+def _candidate_id(audio, base_dir):
+    """Audio path relative to the input folder, minus the extension, usable as a file name ('site_a_thandi')."""
+    relative = os.path.relpath(audio, base_dir)
+    if relative.startswith(os.pardir):
+        relative = os.path.splitdrive(os.path.abspath(audio))[1].lstrip(os.sep)
+    return os.path.splitext(relative)[0].replace(os.sep, "_")
+
+
+def load_candidates(input_dir=None, manifest=None, default_jd=""):
+    """Returns a list of candidate dicts with 'id', 'audio', 'name' and 'job_description'."""
+    candidates = []
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                audio = row["audio"]
+                if not os.path.isabs(audio):
+                    audio = os.path.join(base_dir, audio)
+                candidates.append({
+                    "id": _candidate_id(audio, base_dir),
+                    "audio": audio,
+                    "name": (row.get("name") or "").strip(),
+                    "job_description": _read_text_or_file(row.get("job_description"), base_dir) or default_jd,
+                })
+    elif input_dir:
+        for entry in sorted(os.listdir(input_dir)):
+            if entry.lower().endswith(AUDIO_EXTENSIONS):
+                candidates.append({
+                    "id": _candidate_id(os.path.join(input_dir, entry), input_dir),
+                    "audio": os.path.join(input_dir, entry),
+                    "name": "",
+                    "job_description": default_jd,
+                })
+    else:
+        raise ValueError("Provide either an input directory or a manifest.")
+
+    # The id names the PDF and marks the candidate done on resume, so two candidates must never share one
+    seen = {}
+    for candidate in candidates:
+        if candidate["id"] in seen:
+            raise ValueError(f"{seen[candidate['id']]} and {candidate['audio']} would both be saved as "
+                             f"'{candidate['id']}'; rename one of them.")
+        seen[candidate["id"]] = candidate["audio"]
+    return candidates
+
+
+def load_completed(output_dir):
+    """Candidate ids already recorded as successful in the results manifest."""
+    done = set()
+    path = os.path.join(output_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash mid-write leaves a truncated last line; that candidate simply reruns
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+class BatchRunner:
+    def __init__(self, output_dir, workers=4, language="English", engine=None):
+        self.output_dir = output_dir
+        self.workers = workers
+        self.language = language
+        self.engine = engine or IthubaEngine()
+        self.stage_times = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _timed(self, stage, timings, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage] = time.perf_counter() - start
+
+    def process(self, candidate):
+        timings = {}
+        record = {"id": candidate["id"], "audio": candidate["audio"]}
+        try:
+            transcript = self._timed("transcribe", timings, self.engine.transcribe_audio,
+                                     BatchFile(candidate["audio"]), lang_name=self.language)
+            if transcript.startswith("Error transcribing audio"):
+                raise RuntimeError(transcript)
+
+            clean_text = self._timed("redact", timings, self.engine.redact_pii, transcript)
+
+            profile = self._timed("generate", timings, self.engine.generate_professional_profile,
+                                  clean_text, target_language=self.language,
+                                  job_description=candidate["job_description"])
+            if profile.startswith("Error generating profile"):
+                raise RuntimeError(profile)
+
+            pdf_bytes = self._timed("pdf", timings, create_pdf, profile,
+                                    user_name=candidate["name"] or "Valued Candidate")
+            if not pdf_bytes:
+                raise RuntimeError("PDF creation failed")
+
+            pdf_path = os.path.join(self.output_dir, f"Ithuba_CV_{candidate['id']}.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(pdf_bytes)
+            record.update(status="ok", pdf=pdf_path)
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+
+        record["timings"] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.stage_times[stage].append(seconds)
+            self._append_result(record)
+        return record
+
+    def _append_result(self, record):
+        path = os.path.join(self.output_dir, RESULTS_FILE)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def run(self, candidates, resume=True):
+        completed = load_completed(self.output_dir) if resume else set()
+        pending = [c for c in candidates if c["id"] not in completed]
+        print(f"{len(candidates)} candidates, {len(completed)} already done, {len(pending)} to process.")
+
+        results = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.process, candidate) for candidate in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                results.append(record)
+                print(f"[{len(results)}/{len(pending)}] {record['id']}: {record['status']}")
+        wall = time.perf_counter() - start
+        return results, wall
+
+    def throughput_report(self, wall_seconds):
+        lines = [f"{'stage':<12}{'count':>7}{'mean s':>10}{'max s':>10}{'items/s':>10}"]
+        for stage in STAGES:
+            times = self.stage_times[stage]
+            if not times:
+                continue
+            busy = sum(times)
+            # Throughput with the worker pool kept busy: completions per second of stage wall time
+            rate = len(times) * min(self.workers, len(times)) / busy if busy else 0.0
+            lines.append(f"{stage:<12}{len(times):>7}{busy / len(times):>10.3f}{max(times):>10.3f}{rate:>10.2f}")
+        lines.append(f"wall time: {wall_seconds:.2f}s")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-generate Ithuba CVs from voice notes.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Directory of audio files (.mp3, .wav, .m4a)")
+    source.add_argument("--manifest", help="CSV with audio, name and job_description columns")
+    parser.add_argument("--output", required=True, help="Directory for PDFs and results.jsonl")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent candidates (default: 4)")
+    parser.add_argument("--language", default="English", help="Spoken and target language")
+    parser.add_argument("--jd", help="Default job description .txt for candidates without one")
+    parser.add_argument("--no-resume", action="store_true", help="Reprocess candidates already marked ok")
+    args = parser.parse_args(argv)
+
+    default_jd = _read_text_or_file(args.jd, os.getcwd()) if args.jd else ""
+    candidates = load_candidates(args.input, args.manifest, default_jd=default_jd)
+
+    runner = BatchRunner(args.output, workers=args.workers, language=args.language)
+    results, wall = runner.run(candidates, resume=not args.no_resume)
+    print(runner.throughput_report(wall))
+
+    failed = [r for r in results if r["status"] != "ok"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
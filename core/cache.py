@@ -0,0 +1,426 @@
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with an optional time-to-live (seconds)."""
+
+    def __init__(self, max_entries=128, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """
+    One file per key in a local directory, evicted by total size and age. A file's mtime
+    is when it was written (what the TTL counts from); its atime is the last read (what
+    size eviction orders by), so reading an entry never extends its life.
+    """
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        entry = self.read(key)
+        return None if entry is None else entry[0]
+
+    def read(self, key):
+        """(data, written_at) or None."""
+        path = self._path(key)
+        try:
+            written_at = os.path.getmtime(path)
+            if self.ttl is not None and time.time() - written_at > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            # Record the read in atime only, so eviction is least-recently-used but the TTL still runs
+            os.utime(path, (time.time(), written_at))
+            return data, written_at
+        except OSError:
+            return None
+
+    def put(self, key, data, written_at=None):
+        """written_at keeps the original age of an entry moved here from memory."""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            if written_at is not None:
+                os.utime(tmp_path, (time.time(), written_at))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Disk cache write failed for {key}: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            now = time.time()
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                    self._remove(path)
+                    continue
+                entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+                total += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class TranscriptionCache:
+    """
+    Content-addressed transcript cache. Keys hash the raw audio bytes together with
+    the Whisper prompt, so the same recording in a different language is a miss.
+    """
+
+    def __init__(self, max_entries=256, directory=None, max_bytes=50 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.disk = DiskCache(directory, max_bytes=max_bytes, ttl=ttl) if directory else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        directory = os.getenv("ITHUBA_TRANSCRIPT_CACHE_DIR") or None
+        max_mb = float(os.getenv("ITHUBA_TRANSCRIPT_CACHE_MB", "50"))
+        ttl = float(os.getenv("ITHUBA_TRANSCRIPT_CACHE_TTL", str(7 * 24 * 3600)))
+        return cls(directory=directory, max_bytes=int(max_mb * 1024 * 1024), ttl=ttl)
+
+    @staticmethod
+    def key(audio_bytes, prompt):
+        digest = hashlib.sha256()
+        digest.update(prompt.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(audio_bytes)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key_stream(stream, prompt, chunk_size=1024 * 1024):
+        """Same digest as key(), computed without holding the whole recording in memory."""
+        digest = hashlib.sha256()
+        digest.update(prompt.encode("utf-8"))
+        digest.update(b"\0")
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key):
+        text = self.memory.get(key)
+        if text is None and self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                text = data.decode("utf-8")
+                self.memory.put(key, text)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return text
+
+    def put(self, key, text):
+        self.memory.put(key, text)
+        if self.disk is not None:
+            self.disk.put(key, text.encode("utf-8"))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+
+class ProfileCache:
+    """
+    Generated profiles keyed on the redacted story, job description, target language
+    and model. Only redacted inputs ever reach the key, and keys are hashed, so the
+    raw story is never held here. Rendered PDFs are cached per (profile, name).
+    """
+
+    def __init__(self, max_entries=128, ttl=24 * 3600, max_pdfs=64):
+        self.profiles = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.pdfs = LRUCache(max_entries=max_pdfs, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.pdf_hits = 0
+        self.pdf_misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        max_entries = int(os.getenv("ITHUBA_PROFILE_CACHE_SIZE", "128"))
+        ttl = float(os.getenv("ITHUBA_PROFILE_CACHE_TTL", str(24 * 3600)))
+        return cls(max_entries=max_entries, ttl=ttl)
+
+    @staticmethod
+    def key(clean_text, job_description, target_language, model_name):
+        digest = hashlib.sha256()
+        for part in (clean_text, job_description, target_language, model_name):
+            digest.update(" ".join((part or "").split()).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key, force=False):
+        if force:
+            self._count("bypasses")
+            return None
+        profile = self.profiles.get(key)
+        self._count("misses" if profile is None else "hits")
+        return profile
+
+    def get_any(self, keys, force=False):
+        """
+        (label, profile) for the first of keys ({label: key}, in order) that is cached, else
+        (None, None). Counts as one hit or miss however many keys are tried.
+        """
+        if force:
+            self._count("bypasses")
+            return None, None
+        for label, key in keys.items():
+            profile = self.profiles.get(key)
+            if profile is not None:
+                self._count("hits")
+                return label, profile
+        self._count("misses")
+        return None, None
+
+    def put(self, key, profile):
+        self.profiles.put(key, profile)
+
+    def pdf(self, profile_text, user_name, render, variant=""):
+        """Returns cached PDF bytes for this profile and name, calling render() on a miss.
+        variant distinguishes render options (e.g. a size cap) for the same profile and name."""
+        # Exact hash: line breaks in the markdown change the PDF layout
+        key = hashlib.sha256(f"{user_name}\0{variant}\0{profile_text}".encode("utf-8")).hexdigest()
+        pdf_bytes = self.pdfs.get(key)
+        if pdf_bytes is not None:
+            self._count("pdf_hits")
+            return pdf_bytes
+        self._count("pdf_misses")
+        pdf_bytes = render(profile_text, user_name=user_name)
+        if pdf_bytes:
+            self.pdfs.put(key, pdf_bytes)
+        return pdf_bytes
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        pdf_lookups = self.pdf_hits + self.pdf_misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "pdf_hits": self.pdf_hits,
+            "pdf_misses": self.pdf_misses,
+            "pdf_hit_rate": self.pdf_hits / pdf_lookups if pdf_lookups else 0.0,
+            "entries": len(self.profiles),
+        }
+
+
+class ArtifactStore:
+    """
+    Profiles, transcripts and PDFs shared by every session under one memory budget.
+    Sessions hold only the handle put() returns (a content hash, so identical artifacts
+    are stored once). Values are zlib-compressed where that actually saves space. Past
+    the budget, the least recently used entries spill to a disk directory (or are dropped
+    if there is none). Anything stored more than ttl ago is gone and get() returns None;
+    reading an artifact keeps it in memory longer but does not extend its ttl.
+
+    Artifacts include raw transcripts and PDFs with the candidate's name, so the disk
+    tier is opt-in (ITHUBA_ARTIFACT_DIR); point it only at storage you may keep PII on.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None, disk_bytes=256 * 1024 * 1024,
+                 ttl=24 * 3600, compress_level=6):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress_level = compress_level
+        self.disk = DiskCache(directory, max_bytes=disk_bytes, ttl=ttl) if directory else None
+        self._data = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+        self.spills = 0
+        self.drops = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_bytes=int(float(os.getenv("ITHUBA_ARTIFACT_MB", "64")) * 1024 * 1024),
+            directory=os.getenv("ITHUBA_ARTIFACT_DIR") or None,
+            disk_bytes=int(float(os.getenv("ITHUBA_ARTIFACT_DISK_MB", "256")) * 1024 * 1024),
+            ttl=float(os.getenv("ITHUBA_ARTIFACT_TTL", str(24 * 3600))),
+        )
+
+    def _encode(self, value):
+        # Header byte 1: s(tr) or b(ytes); byte 2: z(lib) or r(aw)
+        kind, raw = (b"s", value.encode("utf-8")) if isinstance(value, str) else (b"b", bytes(value))
+        packed = zlib.compress(raw, self.compress_level)
+        # Already-compressed PDF streams barely shrink; keep those raw and skip inflating on read
+        if len(packed) < len(raw) * 0.9:
+            return kind + b"z" + packed, len(raw)
+        return kind + b"r" + raw, len(raw)
+
+    @staticmethod
+    def _decode(blob):
+        raw = zlib.decompress(blob[2:]) if blob[1:2] == b"z" else blob[2:]
+        return raw.decode("utf-8") if blob[:1] == b"s" else raw
+
+    def put(self, value):
+        """Stores a str or bytes value and returns its handle."""
+        blob, raw_size = self._encode(value)
+        handle = hashlib.sha256(blob[:1] + blob[2:]).hexdigest()
+        with self._lock:
+            previous = self._data.pop(handle, None)
+            if previous is not None:
+                self._used -= len(previous[0])
+            else:
+                self.raw_bytes += raw_size
+                self.stored_bytes += len(blob)
+            self._data[handle] = (blob, time.time())
+            self._used += len(blob)
+            spilled = self._shrink()
+        self._spill(spilled)
+        return handle
+
+    def get(self, handle, default=None):
+        if not handle:
+            return default
+        with self._lock:
+            entry = self._data.get(handle)
+            if entry is not None and time.time() - entry[1] > self.ttl:
+                self._used -= len(self._data.pop(handle)[0])
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(handle)
+                return self._decode(entry[0])
+
+        entry = self.disk.read(handle) if self.disk is not None else None
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return default
+        blob, stored_at = entry
+        with self._lock:
+            self.disk_hits += 1
+            # Back into memory: it is being used again, but it keeps its original age
+            self._data[handle] = (blob, stored_at)
+            self._used += len(blob)
+            spilled = self._shrink()
+        self._spill(spilled)
+        return self._decode(blob)
+
+    def _shrink(self):
+        """Pops least recently used entries until under budget (call with the lock held)."""
+        spilled = []
+        # The newest entry always stays, so a single oversized artifact is still servable
+        while self._used > self.max_bytes and len(self._data) > 1:
+            handle, (blob, stored_at) = self._data.popitem(last=False)
+            self._used -= len(blob)
+            spilled.append((handle, blob, stored_at))
+        if self.disk is not None:
+            self.spills += len(spilled)
+        else:
+            self.drops += len(spilled)
+        return spilled
+
+    def _spill(self, entries):
+        # Disk writes happen outside the lock so a slow disk never blocks readers
+        if self.disk is not None:
+            for handle, blob, stored_at in entries:
+                self.disk.put(handle, blob, written_at=stored_at)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "memory_bytes": self._used,
+                "budget_bytes": self.max_bytes,
+                "compression_ratio": round(self.stored_bytes / self.raw_bytes, 3) if self.raw_bytes else 1.0,
+                "spills": self.spills,
+                "drops": self.drops,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
@@ -1,76 +1,188 @@
+import json
 import os
 import re
-from groq import Groq
-import google.generativeai as genai
-from dotenv import load_dotenv
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from core.ats import extract_keywords, professional_terms
+from core.audio import AudioDecodeError, AudioPreprocessor, audio_size, open_audio_stream, split_segments
+from core.cache import ProfileCache, TranscriptionCache
+from core.ratelimit import limiter
+from core.redaction import redact
+from core.render import JD_SECTIONS, PROFILE_HEADINGS, profile_markdown, replace_sections, split_sections
+from core.router import ModelRouter
+from core.telemetry import tracer
+from core.utils import create_pdf
 
-load_dotenv()
+LONG_AUDIO_BYTES = int(float(os.getenv("ITHUBA_LONG_AUDIO_MB", "10")) * 1024 * 1024)
+# Whisper only attends to the last ~224 prompt tokens; a short tail is all that helps continuity
+CONTEXT_TAIL_CHARS = 200
 
-class IthubaEngine:
-    def __init__(self):
+# Gemini's JSON mode, for the structured extraction and translation steps
+JSON_OUTPUT = {"response_mime_type": "application/json"}
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
 
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+MODEL_NAMES = ['gemini-2.5-flash', 'gemini-1.5-flash', 'gemini-2.0-flash']
+# A model that passed a health check is reused by new processes for this long
+MODEL_STATE_TTL = float(os.getenv("ITHUBA_MODEL_STATE_TTL", str(24 * 3600)))
+# Lets the first page render before the health check competes with it for the GIL
+HEALTH_CHECK_DELAY = float(os.getenv("ITHUBA_MODEL_HEALTH_DELAY", "1.0"))
 
-        model_names = ['gemini-2.5-flash', 'gemini-1.5-flash', 'gemini-2.0-flash']
-        self.llm = None
-        
-        for name in model_names:
-            try:
-                self.llm = genai.GenerativeModel(name)
 
-                print(f"Successfully initialized: {name}")
-                break
-            except Exception as e:
-                print(f"Failed to initialize {name}: {e}")
-                continue
-        
-        if self.llm is None:
-            raise Exception("Could not initialize any Gemini models. Check your API key and internet connection.")
+def load_env():
+    """Loads .env on first engine construction rather than at import."""
+    from dotenv import load_dotenv
+    load_dotenv()
 
-    def redact_pii(self, text):
-        """Simple privacy layer to redact emails and phone numbers for POPIA compliance."""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        phone_pattern = r'\b(?:\+27|0)\d{9}\b'
-        
-        text = re.sub(email_pattern, "[EMAIL REDACTED]", text)
-        text = re.sub(phone_pattern, "[PHONE REDACTED]", text)
-        return text
 
-    def transcribe_audio(self, audio_data, lang_name="English"):
-        """Handles both uploaded files and live recorded bytes via Groq Whisper-v3."""
+def _genai():
+    # google.generativeai takes ~1s to import; only pay for it when Gemini is actually used
+    import google.generativeai as genai
+    return genai
+
+
+def _ordered(model_names, preferred):
+    return ([preferred] if preferred in model_names else []) + [name for name in model_names if name != preferred]
 
-        sa_prompt = f"This is a South African person speaking {lang_name} about their professional work experience and skills."
+
+def _model_state_path():
+    return os.getenv("ITHUBA_MODEL_STATE", os.path.join(tempfile.gettempdir(), "ithuba_model.json"))
+
+
+def load_model_choice(model_names=MODEL_NAMES, ttl=None):
+    """The last healthy model name, if it is recent and still one of model_names."""
+    ttl = MODEL_STATE_TTL if ttl is None else ttl
+    try:
+        with open(_model_state_path()) as f:
+            state = json.load(f)
+        if state["model"] in model_names and time.time() - state["checked_at"] < ttl:
+            return state["model"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def save_model_choice(name):
+    path = _model_state_path()
+    try:
+        with open(path + ".tmp", "w") as f:
+            json.dump({"model": name, "checked_at": time.time()}, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Could not persist model choice: {e}")
+
+
+def init_llm(model_names=MODEL_NAMES, preferred=None):
+    """Returns (model, name) for the first Gemini model that constructs, trying preferred first."""
+    genai = _genai()
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    for name in _ordered(model_names, preferred):
         try:
-            if isinstance(audio_data, bytes):
-                file_to_send = ("audio.wav", audio_data)
-            else:
-                file_to_send = (audio_data.name, audio_data.read())
+            llm = genai.GenerativeModel(name)
 
-            transcription = self.groq_client.audio.transcriptions.create(
-                file=file_to_send,
-                model="whisper-large-v3",
-                prompt=sa_prompt,
-                response_format="text"
-            )
-            return transcription
+            print(f"Successfully initialized: {name}")
+            return llm, name
         except Exception as e:
-            return f"Error transcribing audio: {e}"
+            print(f"Failed to initialize {name}: {e}")
+            continue
 
-    def generate_professional_profile(self, raw_text, target_language="English", job_description=""):
-        """
-        Generates an ATS-optimized CV. If a job_description is provided,
-        it performs a keyword-match to bypass automated filters.
-        """
-        clean_text = self.redact_pii(raw_text.strip())
+    raise Exception("Could not initialize any Gemini models. Check your API key and internet connection.")
+
+
+def healthy_model(model_names=MODEL_NAMES, preferred=None):
+    """First model the Gemini API reports as available, trying preferred first; None if none answer."""
+    genai = _genai()
+    for name in _ordered(model_names, preferred):
+        try:
+            genai.get_model(f"models/{name}")
+            return name
+        except Exception as e:
+            print(f"Health check failed for {name}: {e}")
+    return None
+
+
+def prepare_job_description(job_description, top_n=15):
+    """Reduces a pasted job ad to its ranked ATS keywords; only these reach the prompt."""
+    keywords = extract_keywords(job_description, top_n=top_n)
+    if keywords:
+        return ", ".join(keyword.term for keyword in keywords)
+    # Too short to rank (e.g. just a job title): pass it through, minus layout noise
+    return " ".join((job_description or "").split())
+
+
+def read_audio(audio_data):
+    """Returns (filename, bytes) for recorded bytes or an uploaded file object."""
+    if isinstance(audio_data, bytes):
+        return "audio.wav", audio_data
+    if hasattr(audio_data, "getvalue"):
+        # Streamlit uploads are BytesIO-backed; getvalue() survives earlier reads on reruns
+        return audio_data.name, audio_data.getvalue()
+    return audio_data.name, audio_data.read()
+
+
+def model_key(llm):
+    """Rate-limit bucket name for a Gemini model object ('models/gemini-2.5-flash' -> 'gemini-2.5-flash')."""
+    return getattr(llm, "model_name", "default").rsplit("/", 1)[-1]
+
+
+def parse_profile_data(text):
+    """Structured profile data from a Gemini JSON reply; ValueError if it is not usable."""
+    data = json.loads(_JSON_FENCE.sub("", text.strip()))
+    if not isinstance(data, dict) or not isinstance(data.get("summary"), str) or not data["summary"].strip():
+        raise ValueError("Gemini returned malformed profile data.")
+    competencies = data.get("competencies") if isinstance(data.get("competencies"), dict) else {}
+    return {
+        "summary": data["summary"].strip(),
+        "competencies": {str(k): [str(skill) for skill in v] for k, v in competencies.items() if isinstance(v, list)},
+        "experience": [str(bullet) for bullet in data.get("experience") or []],
+        "attributes": [a for a in data.get("attributes") or [] if isinstance(a, dict)],
+        "headings": data["headings"] if isinstance(data.get("headings"), dict) else {},
+    }
+
+
+def _stitch(parts):
+    return " ".join(part.strip() for part in parts if part and part.strip())
+
+
+class BaseEngine:
+    """Provider-independent pieces shared by the sync and async engines."""
 
-        jd_context = f"TARGET JOB DESCRIPTION: {job_description}" if job_description else "No specific job description provided."
+    # Set by the constructors; engines assembled without __init__ upload recordings unchanged
+    audio_prep = None
+
+    def redact_pii(self, text):
+        """Privacy layer for POPIA compliance: emails, SA phone/ID numbers, bank and card numbers."""
+        with tracer.span("redact", input_chars=len(text)) as span:
+            result = redact(text)
+            span.set(output_chars=len(result.text), redactions=len(result.spans))
+            return result.text
+
+    def _transcription_prompt(self, lang_name):
+        return f"This is a South African person speaking {lang_name} about their professional work experience and skills."
+
+    def _clean_story(self, raw_text):
+        return " ".join(self.redact_pii(raw_text.strip()).split())
+
+    def _profile_inputs(self, raw_text, job_description):
+        """Redacted, whitespace-normalized story and job keywords: all the LLM (and the cache key) sees."""
+        return self._clean_story(raw_text), prepare_job_description(job_description)
+
+    def _prompt_context(self, clean_text, job_description):
+        jd_context = f"TARGET JOB KEYWORDS (most important first): {job_description}" if job_description else "No specific job description provided."
+        hints = professional_terms(clean_text)
+        hint_context = "LOCAL TERMINOLOGY: " + "; ".join(f"'{term}' -> '{label}'" for term, label in hints.items()) if hints else ""
+        return jd_context, hint_context
+
+    def _build_profile_prompt(self, clean_text, target_language, job_description):
+        jd_context, hint_context = self._prompt_context(clean_text, job_description)
 
         system_prompt = f"""
         You are a Senior Technical Recruiter and ATS (Applicant Tracking System) Expert.
         
         INPUT FROM USER: "{clean_text}"
         {jd_context}
+        {hint_context}
         TARGET LANGUAGE: {target_language}
 
         CRITICAL INSTRUCTION: 
@@ -80,7 +192,7 @@ class IthubaEngine:
         - Format the output clearly using professional headings.
             
         YOUR TASK:
-        1. ATS OPTIMIZATION: Use high-traffic industry keywords found in the target job description. 
+        1. ATS OPTIMIZATION: Use the target job keywords wherever the story supports them. 
            Translate informal experience into professional terminology (e.g., 'selling to people' -> 'Direct Sales & Relationship Management').
            
         2. QUANTIFIABLE RESULTS: Wherever possible, estimate impact (e.g., 'Optimized inventory to reduce waste' or 'Maintained 100% service availability').
@@ -103,9 +215,489 @@ class IthubaEngine:
         ## ✨ Leadership & Personal Attributes
         (Identify 3 psychological strengths demonstrated in the story. Frame them using the Marisa Peer mindset.)
         """
-        
+        return system_prompt
+
+    def _build_sections_prompt(self, clean_text, target_language, job_description, headings):
+        jd_context, hint_context = self._prompt_context(clean_text, job_description)
+        heading_lines = "\n        ".join(headings)
+
+        return f"""
+        You are a Senior Technical Recruiter and ATS (Applicant Tracking System) Expert.
+        You are updating part of an existing CV for a new target job.
+
+        INPUT FROM USER: "{clean_text}"
+        {jd_context}
+        {hint_context}
+        TARGET LANGUAGE: {target_language}
+
+        CRITICAL INSTRUCTION:
+        - Rewrite ONLY the sections listed below; the rest of the CV is kept as it is.
+        - Use the target job keywords wherever the story supports them.
+        - NEVER use placeholders like [Date], [City], or [Company Name].
+        - Competencies are grouped by 'Operational', 'Management', or 'Technical'.
+        - Experience bullets use the 'Action + Context + Result' formula.
+
+        Output exactly these markdown headings, in this order, each followed by its content, and nothing else:
+        {heading_lines}
+        """
+
+
+    def _build_extraction_prompt(self, clean_text, job_description):
+        jd_context, hint_context = self._prompt_context(clean_text, job_description)
+
+        return f"""
+        You are a Senior Technical Recruiter and ATS (Applicant Tracking System) Expert.
+
+        INPUT FROM USER: "{clean_text}"
+        {jd_context}
+        {hint_context}
+
+        CRITICAL INSTRUCTION:
+        - Write in professional English; the CV is translated into other languages afterwards.
+        - NEVER invent dates, places or company names that are not in the story.
+        - Use the target job keywords wherever the story supports them, and translate informal
+          experience into professional terminology (e.g. 'selling to people' -> 'Direct Sales & Relationship Management').
+
+        Return only a JSON object with these keys:
+        "summary": a high-impact professional summary (2-3 sentences).
+        "competencies": {{"Operational": [skills], "Management": [skills], "Technical": [skills]}}.
+        "experience": [achievement bullets using the 'Action + Context + Result' formula, with estimated impact].
+        "attributes": [3 objects {{"name": strength, "evidence": how the story shows it, framed with the Marisa Peer mindset}}].
+        """
+
+    def _build_translation_prompt(self, data_json, target_language):
+        headings = json.dumps(PROFILE_HEADINGS, ensure_ascii=False)
+
+        return f"""
+        You are a professional CV translator for South African languages.
+
+        Translate this CV data into {target_language}:
+        {data_json}
+
+        CRITICAL INSTRUCTION:
+        - Keep every JSON key exactly as it is; translate only the text values.
+        - Keep ATS keywords and industry terms recognisable; leave a term in English if {target_language} has no standard equivalent.
+        - Do not add, drop or merge items.
+
+        Return only the translated JSON object, with one extra key "headings": these CV headings in {target_language},
+        keyed as given: {headings}
+        """
+
+
+class IthubaEngine(BaseEngine):
+    """
+    Provider clients are created on first use, and the model comes from the last
+    successful health check, so constructing an engine costs no SDK imports or API calls.
+    The health check itself runs on a background timer (ITHUBA_MODEL_HEALTH_CHECK=0 disables it).
+    """
+
+    def __init__(self, health_check=None):
+        load_env()
+        self.transcription_cache = TranscriptionCache.from_env()
+        self.audio_prep = AudioPreprocessor.from_env()
+        self.profile_cache = ProfileCache.from_env()
+        self.model_name = load_model_choice() or MODEL_NAMES[0]
+        self._groq_client = None
+        self._router = None
+        self._lock = threading.Lock()
+
+        if health_check is None:
+            health_check = os.getenv("ITHUBA_MODEL_HEALTH_CHECK", "1") != "0"
+        self.health_check = None
+        if health_check:
+            self.health_check = threading.Timer(HEALTH_CHECK_DELAY, self.check_model_health)
+            self.health_check.daemon = True
+            self.health_check.start()
+
+    @property
+    def groq_client(self):
+        if self._groq_client is None:
+            with self._lock:
+                if self._groq_client is None:
+                    from groq import Groq
+                    # Retries (429s, and the timeouts/5xx the SDK would retry) happen in core.ratelimit,
+                    # where every session shares the backoff
+                    self._groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+        return self._groq_client
+
+    @groq_client.setter
+    def groq_client(self, client):
+        self._groq_client = client
+
+    @property
+    def router(self):
+        """Routes Gemini calls over MODEL_NAMES by observed latency and errors (see core.router)."""
+        if self._router is None:
+            with self._lock:
+                if self._router is None:
+                    self._router = ModelRouter.from_env(_ordered(MODEL_NAMES, self.model_name), self._make_model)
+        return self._router
+
+    def _make_model(self, name):
+        genai = _genai()
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        return genai.GenerativeModel(name)
+
+    @property
+    def llm(self):
+        """The preferred model; requests themselves go through the router."""
+        return self.router.model(self.router.primary)
+
+    @llm.setter
+    def llm(self, model):
+        # Pinning a ready-made model (tests, scripts) turns routing off
+        self._router = ModelRouter.pinned(model, getattr(model, "model_name", "pinned"))
+
+    def check_model_health(self):
+        """Confirms the current model is served (switching down MODEL_NAMES if not) and persists the choice."""
+        with tracer.span("model_health", model=self.model_name) as span:
+            try:
+                self.llm  # also warms the SDK import before the first real request
+                name = healthy_model(preferred=self.model_name)
+            except Exception as e:
+                span.fail(e)
+                print(f"Model health check failed: {e}")
+                return None
+            span.set(healthy=name)
+            if name is None:
+                return None
+            if name != self.model_name:
+                self.router.prefer(name)
+                self.model_name = name
+                print(f"Switched to healthy model: {name}")
+            save_model_choice(name)
+            return name
+
+    def transcribe_audio(self, audio_data, lang_name="English"):
+        """Handles both uploaded files and live recorded bytes via Groq Whisper-v3."""
+
+        sa_prompt = self._transcription_prompt(lang_name)
+        size = audio_size(audio_data)
+        if size is not None and size > LONG_AUDIO_BYTES:
+            return self.transcribe_long_audio(audio_data, lang_name=lang_name)
+
+        with tracer.span("transcribe", model="whisper-large-v3", input_bytes=size) as span:
+            try:
+                filename, payload = read_audio(audio_data)
+                transcription = self._transcribe_payload(filename, payload, sa_prompt, span=span)
+                span.set(output_chars=len(transcription))
+                return transcription
+            except Exception as e:
+                span.fail(e)
+                return f"Error transcribing audio: {e}"
+
+    def _transcribe_payload(self, filename, payload, prompt, span=None):
+        cache_key = self.transcription_cache.key(payload, prompt)
+        cached = self.transcription_cache.get(cache_key)
+        if span is not None:
+            span.set(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+
+        # The cache stays keyed on what was recorded, so a hit never pays for preprocessing
+        if self.audio_prep is not None:
+            filename, payload = self._prepare_upload(filename, payload)
+        with tracer.span("provider.groq", model="whisper-large-v3", input_bytes=len(payload)):
+            transcription = limiter.call("groq", "whisper-large-v3", lambda: self.groq_client.audio.transcriptions.create(
+                file=(filename, payload),
+                model="whisper-large-v3",
+                prompt=prompt,
+                response_format="text"
+            ), transient=True)
+        self.transcription_cache.put(cache_key, transcription)
+        return transcription
+
+    def _prepare_upload(self, filename, payload):
+        with tracer.span("audio_prep", codec=self.audio_prep.codec, input_bytes=len(payload)) as span:
+            prepared = self.audio_prep.process(filename, payload)
+            span.set(output_bytes=prepared.output_bytes, bytes_saved=prepared.input_bytes - prepared.output_bytes,
+                     input_seconds=prepared.input_seconds, output_seconds=prepared.output_seconds)
+        return prepared.filename, prepared.payload
+
+    def transcribe_long_audio(self, audio_data, lang_name="English", max_segment_seconds=60,
+                              max_workers=4, chain_context=False):
+        """
+        Splits long recordings at pauses and transcribes the segments concurrently.
+        With chain_context=True each segment is prompted with the tail of the previous
+        transcript instead; that reads better across cuts but runs one segment at a time.
+        """
+        sa_prompt = self._transcription_prompt(lang_name)
+        with tracer.span("transcribe_long", model="whisper-large-v3", input_bytes=audio_size(audio_data)) as span:
+            try:
+                return self._transcribe_long(audio_data, sa_prompt, max_segment_seconds, max_workers, chain_context, span)
+            except Exception as e:
+                span.fail(e)
+                return f"Error transcribing audio: {e}"
+
+    def _transcribe_long(self, audio_data, sa_prompt, max_segment_seconds, max_workers, chain_context, span):
+        filename, stream = open_audio_stream(audio_data)
+        try:
+            whole_key = self.transcription_cache.key_stream(stream, sa_prompt)
+            cached = self.transcription_cache.get(whole_key)
+            if cached is not None:
+                span.set(cache_hit=True, output_chars=len(cached))
+                return cached
+
+            stream.seek(0)
+            try:
+                segments = split_segments(stream, max_seconds=max_segment_seconds)
+                if chain_context:
+                    transcription = self._transcribe_chained(segments, sa_prompt)
+                else:
+                    transcription = self._transcribe_concurrent(segments, sa_prompt, max_workers)
+            except AudioDecodeError as e:
+                print(f"Could not split {filename} ({e}); sending it as one request.")
+                stream.seek(0)
+                transcription = self._transcribe_payload(filename, stream.read(), sa_prompt)
+        finally:
+            if stream is not audio_data:
+                stream.close()
+
+        self.transcription_cache.put(whole_key, transcription)
+        span.set(cache_hit=False, output_chars=len(transcription))
+        return transcription
+
+    def _transcribe_concurrent(self, segments, prompt, max_workers):
+        results = {}
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for index, segment in enumerate(segments):
+                pending[pool.submit(self._transcribe_payload, f"segment_{index}.wav", segment, prompt)] = index
+                # Stop decoding ahead of the workers so only a few segments are ever in memory
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = future.result()
+            for future, index in pending.items():
+                results[index] = future.result()
+        return _stitch(results[index] for index in sorted(results))
+
+    def _transcribe_chained(self, segments, prompt):
+        parts = []
+        for index, segment in enumerate(segments):
+            context = f"{prompt} {parts[-1][-CONTEXT_TAIL_CHARS:]}" if parts else prompt
+            parts.append(self._transcribe_payload(f"segment_{index}.wav", segment, context))
+        return _stitch(parts)
+
+    def generate_professional_profile(self, raw_text, target_language="English", job_description="", force=False):
+        """
+        Generates an ATS-optimized CV. If a job_description is provided,
+        it performs a keyword-match to bypass automated filters.
+        Identical redacted inputs are served from the profile cache unless force=True.
+        """
         try:
-            response = self.llm.generate_content(system_prompt)
-            return response.text
+            return self._generate_profile(raw_text, target_language, job_description, force)
         except Exception as e:
-            return f"Error generating profile: {e}"
\ No newline at end of file
+            return f"Error generating profile: {e}"
+
+    def _generate_profile(self, raw_text, target_language, job_description, force):
+        """generate_professional_profile, but a provider failure is raised instead of returned as text."""
+        with tracer.span("generate", model=self.model_name, input_chars=len(raw_text)) as span:
+            clean_text, job_description = self._profile_inputs(raw_text, job_description)
+            cache_key = lambda model: self._cache_key(model, clean_text, job_description, target_language)
+            _, cached = self._cached(cache_key, force=force)
+            span.set(cache_hit=cached is not None)
+            if cached is not None:
+                span.set(output_chars=len(cached))
+                return cached
+
+            system_prompt = self._build_profile_prompt(clean_text, target_language, job_description)
+
+            try:
+                with tracer.span("provider.gemini", model=self.model_name, input_chars=len(system_prompt)) as call:
+                    routed = self._complete(system_prompt)
+                    call.set(model=routed.model, attempts=routed.attempts)
+                self.profile_cache.put(cache_key(routed.model), routed.result)
+                span.set(output_chars=len(routed.result))
+                return routed.result
+            except Exception as e:
+                span.fail(e)
+                raise
+
+    def _complete(self, system_prompt, **options):
+        """One Gemini completion, routed across models and paced by the shared rate limiter."""
+        return self.router.call(
+            lambda llm: limiter.call("gemini", model_key(llm), lambda: llm.generate_content(system_prompt, **options).text))
+
+    def _cache_key(self, model, clean_text, job_description, target_language, variant=""):
+        """
+        Profile cache key for a reply from model. Writes use the model that actually answered
+        and lookups try each model the router would call (see _cached), so a hedged or
+        failed-over reply is still found but is never filed under another model.
+        """
+        return self.profile_cache.key(clean_text, job_description, target_language,
+                                      f"{model}|{variant}" if variant else model)
+
+    def _cached(self, cache_key, force=False, kind="complete"):
+        """
+        (model, reply) for the first cached reply among the models in the order the router
+        would call them now (then any whose circuit is open), or (None, None).
+        """
+        order = self.router.candidates(kind)
+        order += [name for name in self.router.model_names if name not in order]
+        return self.profile_cache.get_any({name: cache_key(name) for name in order}, force=force)
+
+    def extract_profile(self, raw_text, job_description="", force=False):
+        """
+        The story as structured, language-neutral CV data: summary, competencies by
+        category, experience bullets and attributes. One Gemini call, cached like profiles;
+        raises if the reply is not usable data.
+        """
+        with tracer.span("extract", model=self.model_name, input_chars=len(raw_text)) as span:
+            clean_text, prepared_jd = self._profile_inputs(raw_text, job_description)
+            cache_key = lambda model: self._cache_key(model, clean_text, prepared_jd, "structured", "extract")
+            _, cached = self._cached(cache_key, force=force)
+            span.set(cache_hit=cached is not None)
+            if cached is not None:
+                return json.loads(cached)
+
+            system_prompt = self._build_extraction_prompt(clean_text, prepared_jd)
+            with tracer.span("provider.gemini", model=self.model_name, input_chars=len(system_prompt)) as call:
+                routed = self._complete(system_prompt, generation_config=JSON_OUTPUT)
+                call.set(model=routed.model, attempts=routed.attempts)
+            data = parse_profile_data(routed.result)
+            self.profile_cache.put(cache_key(routed.model), json.dumps(data, ensure_ascii=False))
+            return data
+
+    def render_profile(self, data, target_language="English"):
+        """
+        Markdown profile in target_language from extract_profile data. English is laid out
+        locally; other languages cost one translation call of the data (cached), not a full generation.
+        """
+        if target_language == "English":
+            return profile_markdown(data)
+
+        with tracer.span("translate", model=self.model_name, language=target_language) as span:
+            source = json.dumps({k: v for k, v in data.items() if k != "headings"}, ensure_ascii=False, sort_keys=True)
+            cache_key = lambda model: self._cache_key(model, source, "", target_language, "translate")
+            _, cached = self._cached(cache_key)
+            span.set(cache_hit=cached is not None)
+            if cached is not None:
+                translated = json.loads(cached)
+            else:
+                system_prompt = self._build_translation_prompt(source, target_language)
+                with tracer.span("provider.gemini", model=self.model_name, input_chars=len(system_prompt)) as call:
+                    routed = self._complete(system_prompt, generation_config=JSON_OUTPUT)
+                    call.set(model=routed.model, attempts=routed.attempts)
+                translated = parse_profile_data(routed.result)
+                self.profile_cache.put(cache_key(routed.model), json.dumps(translated, ensure_ascii=False))
+            return profile_markdown(translated, translated["headings"])
+
+    def generate_profiles(self, raw_text, languages, job_description="", user_name="Applicant Name",
+                          render=None, force=False, max_workers=4):
+        """
+        The same CV in several languages from a single extract_profile pass; the
+        per-language rendering and PDFs run concurrently.
+        Returns {language: {"profile": markdown or error string, "pdf": bytes or None}}.
+        render(profile_text) makes the PDF (default: create_pdf through the PDF cache).
+        """
+        languages = list(dict.fromkeys(languages))
+        if render is None:
+            render = lambda text: self.profile_cache.pdf(text, user_name, create_pdf)
+
+        with tracer.span("fan_out", model=self.model_name, languages=len(languages)) as span:
+            try:
+                data = self.extract_profile(raw_text, job_description, force=force)
+            except Exception as e:
+                span.fail(e)
+                return {language: {"profile": f"Error generating profile: {e}", "pdf": None} for language in languages}
+
+            def one(language):
+                try:
+                    profile = self.render_profile(data, language)
+                except Exception as e:
+                    return {"profile": f"Error generating profile: {e}", "pdf": None}
+                return {"profile": profile, "pdf": render(profile)}
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = dict(zip(languages, pool.map(one, languages)))
+            span.set(failed=sum(1 for result in results.values() if result["pdf"] is None))
+            return results
+
+    def regenerate_sections(self, profile_text, raw_text, target_language="English", job_description="",
+                            sections=JD_SECTIONS, force=False):
+        """
+        Rewrites only the given sections of an existing profile (by default the ones a job
+        description affects) and keeps the rest word for word. Falls back to a full
+        generate_professional_profile if those sections cannot be found in the profile or the reply.
+        Raises if the provider fails, so an error is never merged into (or taken for) a profile.
+        """
+        with tracer.span("generate_sections", model=self.model_name, sections=",".join(sections)) as span:
+            current = dict(split_sections(profile_text))
+            if not all(key in current for key in sections):
+                span.set(fallback=True)
+                return self._generate_profile(raw_text, target_language, job_description, force)
+
+            clean_text, prepared_jd = self._profile_inputs(raw_text, job_description)
+            # The reply depends on which sections (and their headings) were asked for, not only the inputs
+            headings = [current[key].split("\n", 1)[0].strip() for key in sections]
+            variant = f"sections:{'|'.join(headings)}"
+            cache_key = lambda model: self._cache_key(model, clean_text, prepared_jd, target_language, variant)
+            answered_by, updated = self._cached(cache_key, force=force)
+            span.set(cache_hit=updated is not None)
+
+            if updated is None:
+                system_prompt = self._build_sections_prompt(clean_text, target_language, prepared_jd, headings)
+                try:
+                    with tracer.span("provider.gemini", model=self.model_name, input_chars=len(system_prompt)) as call:
+                        routed = self._complete(system_prompt)
+                        call.set(model=routed.model, attempts=routed.attempts)
+                except Exception as e:
+                    span.fail(e)
+                    raise
+                updated, answered_by = routed.result, routed.model
+
+            replies = {key: chunk for key, chunk in split_sections(updated, order=sections) if key in sections}
+            merged = replace_sections(profile_text, replies) if len(replies) == len(sections) else None
+            if merged is None:
+                span.set(fallback=True)
+                return self._generate_profile(raw_text, target_language, job_description, force)
+            self.profile_cache.put(cache_key(answered_by), updated)
+            span.set(output_chars=len(merged))
+            return merged
+
+    def stream_professional_profile(self, raw_text, target_language="English", job_description="", force=False):
+        """
+        Same as generate_professional_profile, but yields markdown chunks as Gemini
+        produces them so the UI can render before the full CV is ready. Unlike it, a
+        failure (before or mid-stream) is raised, so a truncated CV is never taken
+        for a finished one; only complete replies are cached.
+        """
+        with tracer.span("generate_stream", model=self.model_name, input_chars=len(raw_text)) as span:
+            clean_text, job_description = self._profile_inputs(raw_text, job_description)
+            cache_key = lambda model: self._cache_key(model, clean_text, job_description, target_language)
+            _, cached = self._cached(cache_key, force=force, kind="first_chunk")
+            span.set(cache_hit=cached is not None)
+            if cached is not None:
+                span.set(output_chars=len(cached))
+                yield cached
+                return
+
+            system_prompt = self._build_profile_prompt(clean_text, target_language, job_description)
+            started = time.perf_counter()
+
+            def chunks(llm):
+                stream = limiter.call("gemini", model_key(llm), lambda: llm.generate_content(system_prompt, stream=True))
+                for chunk in stream:
+                    # Safety-filtered or empty chunks raise on .text; skip them rather than abort
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        continue
+                    if text:
+                        yield text
+
+            try:
+                parts = []
+                for routed in self.router.stream(chunks):
+                    if not parts:
+                        span.set(first_chunk_ms=round((time.perf_counter() - started) * 1000, 1),
+                                 routed_model=routed.model, attempts=routed.attempts)
+                    parts.append(routed.result)
+                    yield routed.result
+                if parts:
+                    self.profile_cache.put(cache_key(routed.model), "".join(parts))
+                span.set(output_chars=sum(len(part) for part in parts))
+            except Exception as e:
+                span.fail(e)
+                raise
@@ -0,0 +1,110 @@
+"""
+Unicode fonts for PDF export.
+
+The core PDF fonts only cover latin-1, which loses letters such as 'š' (Sepedi) or
+'ṱ' (Tshivenda). A TTF is embedded instead, but parsing one per document is slow, so
+each font is parsed once per process and first cut down to the Latin repertoire the
+supported languages use (a few hundred glyphs instead of thousands). Documents get a
+lightweight view of that cached font, and fpdf subsets it further to the glyphs used.
+
+Font lookup: ITHUBA_PDF_FONT (and optionally ITHUBA_PDF_FONT_BOLD), else DejaVu Sans
+under the system font directories. None found means PDFs stay on Helvetica.
+"""
+import copy
+import os
+from functools import lru_cache
+from io import BytesIO
+
+try:
+    from unidecode import unidecode
+except ImportError:
+    def unidecode(text): return text
+
+FONT_DIRS = ("/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"))
+REGULAR_FILES = ("DejaVuSans.ttf",)
+BOLD_FILES = ("DejaVuSans-Bold.ttf",)
+
+# Basic Latin, Latin-1, Latin Extended-A/B, Latin Extended Additional (ṱ ḓ ṅ ḽ ṋ) and punctuation
+LATIN_REPERTOIRE = (
+    list(range(0x20, 0x7F)) + list(range(0xA0, 0x250)) + list(range(0x1E00, 0x1F00))
+    + list(range(0x2010, 0x2028)) + list(range(0x2030, 0x203B)) + [0x20AC, 0x2122]
+)
+
+
+def _search(filenames):
+    for directory in FONT_DIRS:
+        for root, _, files in os.walk(directory):
+            for name in filenames:
+                if name in files:
+                    return os.path.join(root, name)
+    return None
+
+
+@lru_cache(maxsize=1)
+def find_unicode_fonts():
+    """(regular, bold) TTF paths, or None. bold is the regular file when no bold face exists."""
+    regular = os.getenv("ITHUBA_PDF_FONT")
+    if regular:
+        return regular, os.getenv("ITHUBA_PDF_FONT_BOLD") or regular
+    regular = _search(REGULAR_FILES)
+    if not regular:
+        return None
+    return regular, _search(BOLD_FILES) or regular
+
+
+@lru_cache(maxsize=8)
+def _latin_subset(path):
+    from fontTools import subset as ftsubset
+    from fontTools import ttLib
+
+    font = ttLib.TTFont(path, recalcTimestamp=False, fontNumber=0)
+    # Hinting only matters for small sizes on low-res screens and is a large share of the bytes
+    options = ftsubset.Options(notdef_outline=True, recommended_glyphs=True, hinting=False)
+    options.drop_tables += ["DSIG", "kern", "GPOS", "GSUB", "GDEF", "FFTM"]
+    subsetter = ftsubset.Subsetter(options)
+    subsetter.populate(unicodes=LATIN_REPERTOIRE)
+    subsetter.subset(font)
+    output = BytesIO()
+    font.save(output)
+    return output.getvalue()
+
+
+class CachedFont:
+    """One TTF style, parsed once and attached to any number of FPDF documents."""
+
+    def __init__(self, path, style=""):
+        from fpdf import FPDF
+        from fpdf.fonts import TTFFont
+
+        self.path = path
+        self.style = style
+        self.data = _latin_subset(path)
+        self.template = TTFFont(FPDF(), BytesIO(self.data), f"template{style}", style)
+        self.codepoints = frozenset(self.template.cmap)
+        self.prepare = lru_cache(maxsize=4096)(self._prepare)
+
+    def _prepare(self, text):
+        # Characters the font lacks (emoji in headings, rare symbols) are transliterated, not boxed
+        return "".join(c if ord(c) in self.codepoints else unidecode(c) for c in text).strip()
+
+    def attach(self, pdf, family):
+        """Registers the font on pdf as family/style: what pdf.add_font does, minus the parsing."""
+        from fontTools import ttLib
+        from fpdf.fonts import SubsetMap
+
+        fontkey = f"{family.lower()}{self.style}"
+        # TTFFont.__deepcopy__ shares cmap and the font descriptor but copies the width table (a
+        # defaultdict that grows on lookup), glyph ids and subset map, so documents never share those
+        font = copy.deepcopy(self.template)
+        font.i = len(pdf.fonts) + 1
+        font.fontkey = fontkey
+        # fpdf subsets ttfont in place when it writes the document, so each document needs its own
+        font.ttfont = ttLib.TTFont(BytesIO(self.data), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.subset = SubsetMap(font)
+        font.missing_glyphs = []
+        pdf.fonts[fontkey] = font
+
+
+@lru_cache(maxsize=8)
+def load_font(path, style=""):
+    return CachedFont(path, style)
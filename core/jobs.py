@@ -0,0 +1,157 @@
+"""
+Process-wide background jobs for the Streamlit app.
+
+A Streamlit rerun (any click, a second tab) abandons whatever the script was doing, so
+slow provider work runs here instead. The session keeps only a job ID and polls it.
+
+    job_id = jobs.submit("generate", build, story, key=jobs.key("generate", story))
+    job = jobs.get(job_id)      # status, progress so far, result or error
+
+Submitting inputs that match an unfinished job returns that job's ID instead of starting
+another. When max_pending jobs are already queued or running, submit raises QueueFullError
+rather than piling up provider calls.
+
+A job function may be a generator: each yielded item is appended to job.progress as it
+arrives (for streaming text), and its return value becomes the result ("".join(progress)
+if it returns nothing).
+"""
+import hashlib
+import inspect
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.telemetry import tracer
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFullError(Exception):
+    """Too many jobs are already queued or running; the caller should ask the user to retry."""
+
+
+class Job:
+    def __init__(self, job_id, kind, key):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.progress = []
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def partial_text(self):
+        return "".join(str(item) for item in list(self.progress))
+
+
+class JobExecutor:
+    def __init__(self, max_workers=4, max_pending=32, retention=600):
+        self.max_pending = max_pending
+        # Finished jobs stay readable this long, so a session that polls late still gets its result
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ithuba-job")
+        self._jobs = {}
+        self._by_key = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_workers=int(os.getenv("ITHUBA_JOB_WORKERS", "4")),
+            max_pending=int(os.getenv("ITHUBA_JOB_QUEUE", "32")),
+            retention=float(os.getenv("ITHUBA_JOB_RETENTION", "600")),
+        )
+
+    @staticmethod
+    def key(kind, *parts):
+        digest = hashlib.sha256(kind.encode("utf-8"))
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        return digest.hexdigest()
+
+    def submit(self, kind, fn, *args, key=None, **kwargs):
+        """Returns the job ID: a new job, or the unfinished job already running these inputs."""
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(self._by_key.get(key)) if key else None
+            if existing is not None and not existing.finished:
+                self.coalesced += 1
+                return existing.id
+            if self._pending() >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"{self.max_pending} jobs are already waiting; try again shortly.")
+
+            job = Job(f"{kind}-{next(self._ids)}", kind, key)
+            self._jobs[job.id] = job
+            if key:
+                self._by_key[key] = job.id
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        with tracer.span("job", kind=job.kind, queued_ms=round((time.time() - job.submitted_at) * 1000, 1)) as span:
+            try:
+                result = fn(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    result = _drain(result, job.progress)
+                    if result is None:
+                        result = job.partial_text
+                job.result = result
+                job.finished_at = time.time()
+                job.status = DONE
+            except Exception as e:
+                span.fail(e)
+                job.error = str(e)
+                job.finished_at = time.time()
+                job.status = FAILED
+                print(f"Job {job.id} failed: {e}")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "done": statuses.count(DONE),
+            "failed": statuses.count(FAILED),
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "max_pending": self.max_pending,
+        }
+
+
+def _drain(generator, sink):
+    """Drains generator into sink (a list) and returns the generator's return value."""
+    while True:
+        try:
+            sink.append(next(generator))
+        except StopIteration as stop:
+            return stop.value
@@ -0,0 +1,295 @@
+"""
+Process-wide rate limiting for provider calls, shared by every session and engine.
+
+    transcript = limiter.call("groq", "whisper-large-v3", lambda: client.audio.transcriptions.create(...))
+
+Each (provider, model) pair has a token bucket. A call reserves the next free slot and
+sleeps until that slot comes up, so waiting requests are served in arrival order
+instead of all firing at once and collecting 429s. If a 429 (or a 503) comes back
+anyway, the call is retried with jittered exponential backoff. The bucket is also
+paused for the provider's Retry-After, so every other session waits out the same window.
+
+Calls made with transient=True (Groq, which has no failover behind it and whose SDK
+retries are off) are also retried on the errors the SDK used to retry: timeouts,
+dropped connections, 408/409 and 5xx. Those back off in the calling request only;
+they say nothing about quota, so the shared bucket is not paused.
+
+ITHUBA_RATE_LIMITS sets requests per minute, most specific first, e.g.
+"gemini/gemini-2.5-flash=10,gemini=60,groq=20". Unlisted providers have no quota,
+but they still back off together on 429s. Other knobs:
+  ITHUBA_RATE_BURST       requests allowed back to back before pacing starts (default 3)
+  ITHUBA_RATE_MAX_WAIT    longest a call will queue for a slot, in seconds (default 60)
+  ITHUBA_RATE_RETRIES     retries after a 429/503 (default 4)
+  ITHUBA_RATE_BACKOFF     first backoff step in seconds, doubled per retry (default 1)
+  ITHUBA_RATE_BACKOFF_MAX longest single backoff in seconds (default 30)
+"""
+import asyncio
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from core.telemetry import tracer
+
+RETRY_STATUSES = (429, 503)
+RATE_LIMIT_ERRORS = ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+# Retried for transient=True calls only
+TRANSIENT_STATUSES = (408, 409, 500, 502, 504)
+TRANSIENT_ERRORS = ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "ConnectTimeout",
+                    "RemoteProtocolError", "DeadlineExceeded", "ServiceUnavailable", "InternalServerError")
+_RETRY_IN = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+
+class RateLimitError(Exception):
+    """The wait for a provider slot would exceed ITHUBA_RATE_MAX_WAIT."""
+
+
+def _status(error):
+    for source in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "code"):
+            value = getattr(source, attribute, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_retryable(error):
+    """A 429 or 503 from the provider: worth waiting and trying again."""
+    return type(error).__name__ in RATE_LIMIT_ERRORS or _status(error) in RETRY_STATUSES
+
+
+def is_rate_limited(error):
+    """A quota answer (429, or our own limiter refusing to queue longer): says nothing about the model's health."""
+    return isinstance(error, RateLimitError) or type(error).__name__ in RATE_LIMIT_ERRORS or _status(error) == 429
+
+
+def is_transient(error):
+    """A timeout, dropped connection or server-side error: worth another attempt, but not a quota signal."""
+    if isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in TRANSIENT_ERRORS:
+        return True
+    status = _status(error)
+    return status in TRANSIENT_STATUSES or (status is not None and status >= 500)
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait (Retry-After header or Gemini's 'retry in Ns'), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass  # unparseable header: fall back to backoff rather than mask the 429
+    match = _RETRY_IN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """
+    Requests-per-minute bucket that hands out reservations (GCRA): each caller learns
+    when its slot comes up and sleeps until then. rpm=None means no quota, only pauses.
+    """
+
+    def __init__(self, rpm=None, burst=3, window=200):
+        self.rpm = rpm
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self.burst = max(1, burst)
+        self._tat = 0.0  # theoretical arrival time of the next request
+        self._slots = deque()  # start times of reservations still waiting
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited = 0
+        self.max_depth = 0
+        self.throttled = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def reserve(self, max_wait=None):
+        """Seconds to wait before calling; raises RateLimitError rather than wait more than max_wait."""
+        now = time.monotonic()
+        with self._lock:
+            tat = max(self._tat, now)
+            delay = max(0.0, tat - (self.burst - 1) * self.interval - now)
+            if max_wait is not None and delay > max_wait:
+                self.rejected += 1
+                raise RateLimitError(f"Rate limit reached; the next slot is {delay:.0f}s away.")
+            self._tat = tat + self.interval
+            self.calls += 1
+            self._waits.append(delay)
+            if delay > 0:
+                self.waited += 1
+                self._slots.append(now + delay)
+            self._prune(now)
+            self.max_depth = max(self.max_depth, len(self._slots))
+        return delay
+
+    def note_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def pause(self, seconds, retry=False):
+        """No new slot starts within the next seconds (the provider said to back off)."""
+        now = time.monotonic()
+        with self._lock:
+            self.throttled += 1
+            self.retries += retry
+            self._tat = max(self._tat, now + seconds + (self.burst - 1) * self.interval)
+
+    def _prune(self, now):
+        while self._slots and self._slots[0] <= now:
+            self._slots.popleft()
+
+    def depth(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            return len(self._slots)
+
+    def stats(self):
+        depth = self.depth()
+        with self._lock:
+            waits = sorted(self._waits)
+        return {
+            "rpm": self.rpm,
+            "queued": depth,
+            "max_queued": self.max_depth,
+            "calls": self.calls,
+            "waited": self.waited,
+            "wait_ms_mean": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else 0.0,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "rejected": self.rejected,
+        }
+
+
+class RateLimiter:
+    def __init__(self, limits=None, burst=3, max_wait=60.0, retries=4, backoff=1.0, backoff_max=30.0, seed=None):
+        # "provider" or "provider/model" -> requests per minute
+        self.limits = dict(limits or {})
+        self.burst = burst
+        self.max_wait = max_wait
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._buckets = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            limits=parse_limits(os.getenv("ITHUBA_RATE_LIMITS", "")),
+            burst=int(os.getenv("ITHUBA_RATE_BURST", "3")),
+            max_wait=float(os.getenv("ITHUBA_RATE_MAX_WAIT", "60")),
+            retries=int(os.getenv("ITHUBA_RATE_RETRIES", "4")),
+            backoff=float(os.getenv("ITHUBA_RATE_BACKOFF", "1.0")),
+            backoff_max=float(os.getenv("ITHUBA_RATE_BACKOFF_MAX", "30")),
+        )
+
+    def bucket(self, provider, model):
+        key = f"{provider}/{model}"
+        with self._lock:
+            if key not in self._buckets:
+                rpm = self.limits.get(key, self.limits.get(provider))
+                self._buckets[key] = TokenBucket(rpm, self.burst)
+            return self._buckets[key]
+
+    def backoff_delay(self, attempt, error):
+        """Full-jitter exponential backoff, but never sooner than the provider's Retry-After."""
+        with self._lock:
+            jitter = self._random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        requested = retry_after(error)
+        return jitter if requested is None else requested + jitter * 0.1
+
+    def call(self, provider, model, request, transient=False):
+        """
+        Runs request() in its turn for (provider, model), retrying 429/503s with backoff.
+        transient=True also retries timeouts, connection errors and other server errors.
+        """
+        bucket = self.bucket(provider, model)
+        for attempt in range(self.retries + 1):
+            delay = bucket.reserve(self.max_wait)
+            if delay > 0:
+                with tracer.span("rate_wait", provider=provider, model=model, wait_ms=round(delay * 1000, 1)):
+                    time.sleep(delay)
+            try:
+                return request()
+            except Exception as e:
+                time.sleep(self._throttled(provider, model, bucket, attempt, e, transient))
+
+    async def acall(self, provider, model, request, transient=False):
+        """asyncio version of call(): request() returns an awaitable and waiting does not block the loop."""
+        bucket = self.bucket(provider, model)
+        for attempt in range(self.retries + 1):
+            delay = bucket.reserve(self.max_wait)
+            if delay > 0:
+                with tracer.span("rate_wait", provider=provider, model=model, wait_ms=round(delay * 1000, 1)):
+                    await asyncio.sleep(delay)
+            try:
+                return await request()
+            except Exception as e:
+                await asyncio.sleep(self._throttled(provider, model, bucket, attempt, e, transient))
+
+    def _throttled(self, provider, model, bucket, attempt, error, transient=False):
+        """
+        Seconds this caller should back off before retrying (0 after a 429/503, which pauses
+        the whole bucket instead); re-raises errors that are not worth retrying.
+        """
+        retry = attempt < self.retries
+        if is_retryable(error):
+            pause = self.backoff_delay(attempt, error)
+            bucket.pause(pause, retry=retry)
+            if not retry:
+                raise error
+            print(f"{provider}/{model} throttled ({error}); retrying in {pause:.1f}s")
+            return 0.0
+        if not (transient and retry and is_transient(error)):
+            raise error
+        backoff = self.backoff_delay(attempt, error)
+        bucket.note_retry()
+        print(f"{provider}/{model} failed ({error}); retrying in {backoff:.1f}s")
+        return backoff
+
+    def stats(self):
+        with self._lock:
+            buckets = sorted(self._buckets.items())
+        return [{"bucket": key, **bucket.stats()} for key, bucket in buckets]
+
+    def prometheus_text(self):
+        rows = self.stats()
+        metrics = (
+            ("ithuba_rate_queue_depth", "gauge", "Provider calls waiting for a rate-limit slot.", "queued"),
+            ("ithuba_rate_calls_total", "counter", "Provider calls admitted by the rate limiter.", "calls"),
+            ("ithuba_rate_waited_total", "counter", "Provider calls that had to wait for a slot.", "waited"),
+            ("ithuba_rate_throttled_total", "counter", "429/503 responses that paused a bucket.", "throttled"),
+            ("ithuba_rate_rejected_total", "counter", "Calls refused because the wait exceeded the maximum.", "rejected"),
+        )
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for row in rows:
+                provider, model = row["bucket"].split("/", 1)
+                lines.append(f'{name}{{provider="{provider}",model="{model}"}} {row[field]}')
+        return "\n".join(lines) + "\n"
+
+
+def parse_limits(spec):
+    """'gemini=60,groq/whisper-large-v3=20' -> {'gemini': 60.0, 'groq/whisper-large-v3': 20.0}"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            limits[key.strip()] = float(value)
+    return limits
+
+
+limiter = RateLimiter.from_env()
@@ -0,0 +1,177 @@
+"""
+Single-pass PII redaction for POPIA compliance.
+
+Every detector is compiled into one alternation, so a transcript is scanned once no
+matter how many detectors exist. Detectors that need more than a regex (Luhn checks on
+SA ID and card numbers) validate each match. When a validator rejects one, the other
+detectors are retried at the same position, so a number that merely looks like an ID
+(a phone number followed by digits) is still caught by the phone detector.
+
+Each detector declares the characters a match can start with ('lead'). Neighbouring
+detectors with the same lead share a single lookahead, so at most positions the engine
+rejects a whole family of branches with one character test.
+
+    python -m core.redaction     # micro-benchmark, reports MB/s
+"""
+import re
+import time
+from collections import Counter, namedtuple
+
+Detector = namedtuple("Detector", "name lead pattern replacement validator")
+Span = namedtuple("Span", "label start end")
+RedactionResult = namedtuple("RedactionResult", "text spans counts")
+
+
+def luhn_valid(digits):
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        value = int(char)
+        if index % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def _digits(value):
+    return re.sub(r"\D", "", value)
+
+
+def valid_sa_id(value):
+    """13 digits: YYMMDD birth date, gender/sequence, citizenship (0/1), legacy digit, Luhn check."""
+    digits = _digits(value)
+    if len(digits) != 13:
+        return False
+    month, day = int(digits[2:4]), int(digits[4:6])
+    if not (1 <= month <= 12 and 1 <= day <= 31) or digits[10] not in "01":
+        return False
+    return luhn_valid(digits)
+
+
+def valid_card(value):
+    digits = _digits(value)
+    return 13 <= len(digits) <= 19 and luhn_valid(digits)
+
+
+DEFAULT_DETECTORS = (
+    # Local part taken whole, never backtracked: without that every ordinary word is retried one char
+    # at a time looking for '@'. Lookahead + backreference does what '++' does, but before Python 3.11 too
+    Detector("email", r"[A-Za-z0-9._%+-]", r"\b(?=(?P<email_local>[A-Za-z0-9._%+-]+))(?P=email_local)@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b",
+             "[EMAIL REDACTED]", None),
+    # Account numbers are only recognisable by their label, which is kept in the output
+    Detector(
+        "account",
+        r"[AaBbRr]",
+        r"\b(?i:account|acc|acct|rekening|bank)\b\.?(?:[ ]*(?i:no\.?|nr\.?|number|nommer|\#))?[ :]*\d[\d -]{4,14}\d\b",
+        lambda value: re.split(r"(?=\d)", value, maxsplit=1)[0] + "[ACCOUNT REDACTED]",
+        None,
+    ),
+    Detector("sa_id", r"[\d+(]", r"(?<!\d)\d{6}[ -]?\d{4}[ -]?\d{3}(?!\d)", "[ID NUMBER REDACTED]", valid_sa_id),
+    Detector("card", r"[\d+(]", r"(?<!\d)(?:\d{4}[ -]){3}\d{1,7}(?!\d)|(?<!\d)\d{15,19}(?!\d)", "[CARD REDACTED]", valid_card),
+    Detector(
+        "phone",
+        r"[\d+(]",
+        r"(?<![\w+])(?:(?:\+27|0027)[ -]?(?:\(0\)[ -]?)?\d{2}|\(?0\d{2}\)?)[ -]?\d{3}[ -]?\d{4}(?!\d)",
+        "[PHONE REDACTED]",
+        None,
+    ),
+)
+
+
+def _compile(detectors):
+    families = []
+    for detector in detectors:
+        branch = f"(?P<{detector.name}>{detector.pattern})"
+        if families and families[-1][0] == detector.lead:
+            families[-1][1].append(branch)
+        else:
+            families.append((detector.lead, [branch]))
+    # "(?!)" never matches, so a redactor with no detectors is a no-op rather than an empty pattern
+    return re.compile("|".join(f"(?={lead})(?:{'|'.join(branches)})" for lead, branches in families) or "(?!)")
+
+
+class Redactor:
+    def __init__(self, detectors=DEFAULT_DETECTORS):
+        self.detectors = {d.name: d for d in detectors}
+        self._pattern = _compile(detectors)
+        # frozenset of rejected detector names -> pattern of the remaining ones (built on first need)
+        self._fallbacks = {}
+
+    def _without(self, names):
+        names = frozenset(names)
+        if names not in self._fallbacks:
+            self._fallbacks[names] = _compile([d for d in self.detectors.values() if d.name not in names])
+        return self._fallbacks[names]
+
+    def _valid(self, match):
+        validator = self.detectors[match.lastgroup].validator
+        return validator is None or validator(match.group())
+
+    def redact(self, text):
+        """Returns RedactionResult(text, spans, counts); spans index into the original text."""
+        spans = []
+        parts = []
+        position = search_from = 0
+        while True:
+            match = self._pattern.search(text, search_from)
+            if match is None:
+                break
+            start = match.start()
+            rejected = set()
+            while match is not None and not self._valid(match):
+                # Let the remaining detectors try the same position before moving on
+                rejected.add(match.lastgroup)
+                match = self._without(rejected).match(text, start)
+            if match is None:
+                search_from = start + 1
+                continue
+            detector = self.detectors[match.lastgroup]
+            spans.append(Span(detector.name, start, match.end()))
+            parts.append(text[position:start])
+            replacement = detector.replacement
+            parts.append(replacement(match.group()) if callable(replacement) else replacement)
+            position = search_from = max(match.end(), start + 1)
+        parts.append(text[position:])
+        return RedactionResult("".join(parts), spans, Counter(span.label for span in spans))
+
+    def redact_text(self, text):
+        return self.redact(text).text
+
+    def redact_many(self, texts):
+        return [self.redact(text) for text in texts]
+
+
+_default = Redactor()
+
+
+def redact(text):
+    return _default.redact(text)
+
+
+def redact_many(texts):
+    return _default.redact_many(texts)
+
+
+SAMPLE_TRANSCRIPT = (
+    "Sawubona, I have run a spaza shop in Tembisa for six years and deliver stock with my bakkie. "
+    "You can phone me on +27 82 123 4567 or 011-555-0199, email thandi.m@example.co.za. "
+    "My ID is 8001015009087 and the stokvel pays into account no 62123456789 every month. "
+    "I also did piece-work at a car wash and trained three young people to manage the till. "
+)
+
+
+def benchmark(megabytes=5, redactor=None):
+    """Redacts ~megabytes of synthetic transcript text and returns MB/s."""
+    redactor = redactor or _default
+    text = SAMPLE_TRANSCRIPT * max(1, int(megabytes * 1024 * 1024 / len(SAMPLE_TRANSCRIPT)))
+    start = time.perf_counter()
+    result = redactor.redact(text)
+    elapsed = time.perf_counter() - start
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    return {"megabytes": round(size_mb, 2), "seconds": round(elapsed, 4),
+            "mb_per_s": round(size_mb / elapsed, 2), "redactions": sum(result.counts.values())}
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,327 @@
+"""
+Parse-once profile rendering.
+
+parse_markdown turns a generated profile into a small block AST (heading, subheading,
+label, bullet, paragraph, blank). The same cached AST drives the on-screen markdown and
+the PDF, so a profile is scanned once however many times it is shown or exported. Blocks
+keep their inline markdown (bold, italics) for the screen; only the PDF strips it.
+
+split_sections / replace_sections work on the '## ' sections of a profile, so one part
+can be regenerated without touching the rest.
+
+PDFs use core Helvetica whenever the text fits latin-1 (the smallest file) and embed a
+subsetted Unicode TTF (see core.fonts) only when it does not. max_kb trades the embedded
+font for transliteration when a document would otherwise be too large.
+
+    python -m core.render     # benchmark: PDFs/sec and per-document memory
+"""
+import re
+import time
+import tracemalloc
+from collections import namedtuple
+from functools import lru_cache
+
+from core.fonts import find_unicode_fonts, load_font
+
+try:
+    from unidecode import unidecode
+except ImportError:
+    def unidecode(text): return text
+
+# depth: nesting level of a bullet, or how far below '##' a subheading is ('###' -> 1)
+Block = namedtuple("Block", "kind text depth", defaults=(0,))
+
+PAGE_WIDTH = 210
+MARGIN = 20
+BULLET_INDENT = 5
+# kind -> (font style, font size, line height)
+STYLES = {
+    "heading": ("B", 20, 12),
+    "subheading": ("B", 12, 8),
+    "label": ("B", 11, 6),
+    "bullet": ("", 11, 6),
+    "paragraph": ("", 11, 6),
+}
+
+
+# Section keys in prompt order, with the emoji each heading carries. Headings are written
+# in the target language, so the emoji (or failing that, the position) identifies them.
+SECTION_MARKERS = (("summary", "📝"), ("competencies", "🛠"), ("experience", "📈"), ("attributes", "✨"))
+SECTION_KEYS = tuple(key for key, _ in SECTION_MARKERS)
+# The sections a new job description changes; summary and attributes describe the person
+JD_SECTIONS = ("competencies", "experience")
+
+_SECTION_START = re.compile(r"(?m)^(?=[ \t]*##(?!#))")
+
+
+def split_sections(text, order=SECTION_KEYS):
+    """
+    Returns [(key, markdown)] for the profile, in order. The title block before the first
+    '## ' heading has key None. Sections without a known emoji take the next unused key from order.
+    """
+    chunks = _SECTION_START.split(text)
+    sections = [(None, chunks[0])] if chunks[0] else []
+    used = set()
+    fallback = iter(order)
+    for chunk in chunks[1:]:
+        heading = chunk.split("\n", 1)[0]
+        key = next((k for k, marker in SECTION_MARKERS if marker in heading and k not in used), None)
+        if key is None:
+            key = next((k for k in fallback if k not in used), f"section_{len(sections)}")
+        used.add(key)
+        sections.append((key, chunk))
+    return sections
+
+
+def replace_sections(text, updates):
+    """The profile with the sections in updates ({key: markdown}) swapped in; None if one is missing."""
+    sections = split_sections(text)
+    if not set(updates) <= {key for key, _ in sections}:
+        return None
+    parts = []
+    for key, chunk in sections:
+        if key in updates:
+            # Keep the blank line that separated this section from the next one
+            trailing = chunk[len(chunk.rstrip("\n")):] or "\n"
+            chunk = updates[key].strip("\n") + trailing
+        parts.append(chunk)
+    return "".join(parts)
+
+
+# English headings for profile_markdown; other languages bring their own (see IthubaEngine.render_profile)
+PROFILE_HEADINGS = {
+    "summary": "Professional Summary",
+    "competencies": "Technical & Core Competencies",
+    "experience": "Professional Experience & Achievements",
+    "attributes": "Leadership & Personal Attributes",
+    "Operational": "Operational",
+    "Management": "Management",
+    "Technical": "Technical",
+}
+
+
+def profile_markdown(data, headings=None):
+    """
+    Lays out structured profile data (see IthubaEngine.extract_profile) as the same
+    markdown the generation prompt asks for, so parsing, section updates and PDFs work unchanged.
+    """
+    headings = {**PROFILE_HEADINGS, **(headings or {})}
+    lines = ["# [FULL NAME - REDACTED]", "", f"## 📝 {headings['summary']}", data.get("summary", ""), ""]
+    lines.append(f"## 🛠 {headings['competencies']}")
+    for category, skills in data.get("competencies", {}).items():
+        if skills:
+            lines.append(f"* **{headings.get(category, category)}:** {', '.join(skills)}")
+    lines += ["", f"## 📈 {headings['experience']}"]
+    lines += [f"* {bullet}" for bullet in data.get("experience", [])]
+    lines += ["", f"## ✨ {headings['attributes']}"]
+    for attribute in data.get("attributes", []):
+        lines.append(f"* **{attribute.get('name', '')}:** {attribute.get('evidence', '')}")
+    return "\n".join(lines) + "\n"
+
+
+def _strip_emphasis(text):
+    return text.replace("**", "").replace("*", "").strip()
+
+
+@lru_cache(maxsize=256)
+def parse_markdown(text):
+    """Returns the profile as a tuple of Blocks. Cached, so repeated renders of one profile parse once."""
+    blocks = []
+    indents = []  # indentation of the bullets enclosing the current one
+    for raw in str(text).split("\n"):
+        line = raw.strip()
+        if not line:
+            blocks.append(Block("blank", ""))
+            continue
+        if line[:2] in ("- ", "* ", "• "):
+            indent = len(raw.expandtabs(4)) - len(raw.expandtabs(4).lstrip())
+            while indents and indents[-1] > indent:
+                indents.pop()
+            if not indents or indent > indents[-1]:
+                indents.append(indent)
+            blocks.append(Block("bullet", line[2:].strip(), len(indents) - 1))
+            continue
+
+        indents = []
+        if line.startswith("#") and not line.startswith("##"):
+            blocks.append(Block("heading", line.lstrip("#").strip()))
+        elif line.startswith("##"):
+            level = len(line) - len(line.lstrip("#"))
+            blocks.append(Block("subheading", line.lstrip("#").strip(), level - 2))
+        elif line.startswith("**"):
+            # '**Operational:** Stock control' is a bold lead-in, not a section heading
+            blocks.append(Block("label", line))
+        else:
+            blocks.append(Block("paragraph", line))
+    return tuple(blocks)
+
+
+def to_markdown(blocks):
+    """Normalised markdown for st.markdown, built from the same AST as the PDF."""
+    lines = []
+    for block in blocks:
+        if block.kind == "heading":
+            lines.append(f"# {block.text}")
+        elif block.kind == "subheading":
+            lines.append(f"{'#' * (2 + block.depth)} {block.text}")
+        elif block.kind == "bullet":
+            lines.append(f"{'  ' * block.depth}- {block.text}")
+        elif block.kind == "label":
+            lines.append(f"{block.text}  ")  # hard break: consecutive labels stay on their own lines
+        else:
+            lines.append(block.text)
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=4096)
+def _latin(text):
+    # Core PDF fonts are latin-1 only: keep what fits (Afrikaans 'ê', Xitsonga 'Ñ'), transliterate the rest
+    return "".join(c if ord(c) < 256 else unidecode(c) for c in text).strip()
+
+
+class PdfRenderer:
+    """Renders block ASTs to A4 PDF bytes, switching fonts only when the block style changes."""
+
+    UNICODE_FAMILY = "IthubaUnicode"
+
+    def __init__(self, font_family="Helvetica", margin=MARGIN, unicode_fonts="auto", max_kb=None):
+        self.font_family = font_family
+        self.margin = margin
+        self.width = PAGE_WIDTH - 2 * margin
+        # "auto" looks the TTFs up on first use; None forces core fonts; or a (regular, bold) path pair
+        self.unicode_fonts = unicode_fonts
+        self.max_kb = max_kb
+
+    def _fonts(self):
+        """{style: CachedFont} for the Unicode TTFs, or None when there are none."""
+        paths = find_unicode_fonts() if self.unicode_fonts == "auto" else self.unicode_fonts
+        if not paths:
+            return None
+        return {"": load_font(paths[0], ""), "B": load_font(paths[1], "B")}
+
+    def _new_document(self):
+        from fpdf import FPDF  # deferred: fpdf is a slow import and the app's first paint never needs it
+        pdf = FPDF(orientation='P', unit='mm', format='A4')
+        pdf.set_compression(True)
+        pdf.add_page()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.set_left_margin(self.margin)
+        pdf.set_right_margin(self.margin)
+        return pdf
+
+    @staticmethod
+    def _lines(blocks, user_name):
+        """(kind, plain text, indent in mm) per block; the PDF has no inline emphasis, so markers are dropped."""
+        lines = []
+        name_placed = False
+        for block in blocks:
+            if block.kind == "heading":
+                text = user_name.upper() if not name_placed else _strip_emphasis(block.text)
+                name_placed = True
+            elif block.kind == "bullet":
+                text = f"- {_strip_emphasis(block.text)}"
+            else:
+                text = _strip_emphasis(block.text)
+            lines.append((block.kind, text, block.depth * BULLET_INDENT if block.kind == "bullet" else 0))
+        return lines
+
+    def render(self, blocks, user_name="Applicant Name", max_kb=None):
+        """
+        PDF bytes for a profile. The Unicode font is embedded only if some text needs it;
+        if that document exceeds max_kb, the transliterated core-font version is returned instead.
+        """
+        if isinstance(blocks, str):
+            blocks = parse_markdown(blocks)
+        lines = self._lines(blocks, user_name)
+        max_kb = self.max_kb if max_kb is None else max_kb
+
+        fonts = self._fonts()
+        if fonts:
+            prepared = [(kind, fonts[STYLES[kind][0]].prepare(text) if kind != "blank" else "", indent)
+                        for kind, text, indent in lines]
+            if any(ord(c) > 255 for _, text, _ in prepared for c in text):
+                pdf_bytes = self._render(prepared, fonts)
+                if not max_kb or len(pdf_bytes) <= max_kb * 1024:
+                    return pdf_bytes
+        return self._render([(kind, _latin(text), indent) for kind, text, indent in lines], None)
+
+    def _render(self, lines, fonts):
+        pdf = self._new_document()
+        family = self.font_family
+        if fonts:
+            family = self.UNICODE_FAMILY
+            for font in fonts.values():
+                font.attach(pdf, family)
+        current_style = None
+
+        for kind, text, indent in lines:
+            pdf.set_x(self.margin + indent)
+            if kind == "blank":
+                pdf.ln(5)
+                continue
+
+            style, size, line_height = STYLES[kind]
+            if (style, size) != current_style:
+                pdf.set_font(family, style, size=size)
+                current_style = (style, size)
+
+            pdf.multi_cell(self.width - indent, line_height, text=text, align='L')
+            if kind == "heading":
+                pdf.ln(4)
+
+        return bytes(pdf.output())
+
+    def render_many(self, items, max_kb=None):
+        """Renders (profile, user_name) pairs for batch jobs; failures come back as None."""
+        results = []
+        for profile, user_name in items:
+            try:
+                results.append(self.render(profile, user_name=user_name, max_kb=max_kb))
+            except Exception as e:
+                print(f"CRITICAL PDF ERROR: {str(e)}")
+                results.append(None)
+        return results
+
+
+SAMPLE_PROFILE = """# [FULL NAME - REDACTED]
+
+## 📝 Professional Summary
+Entrepreneurial retail operator with 6 years running a community spaza shop in Tembisa.
+
+## 🛠 Technical & Core Competencies
+- **Operational:** Stock Control, Cash Handling, Supplier Negotiation
+- **Management:** Team Supervision, Budgeting, Community Engagement
+- **Technical:** Mobile Money, Basic Bookkeeping
+
+## 📈 Professional Experience & Achievements
+- Managed daily stock ordering for 300+ product lines, reducing waste by an estimated 15%.
+- Coordinated deliveries with a light commercial vehicle across three townships.
+- Trained and supervised two assistants on till and customer service.
+
+## ✨ Leadership & Personal Attributes
+- Resilience: kept the business trading through load-shedding and supply shortages.
+- Initiative: introduced a stokvel-backed bulk-buying arrangement.
+- Trustworthiness: handled community savings with full transparency.
+"""
+
+
+def benchmark(documents=50, profile=SAMPLE_PROFILE):
+    """Returns PDFs/sec over a render_many batch and the peak memory of rendering one document."""
+    renderer = PdfRenderer()
+    renderer.render(profile)  # warm parse and transliteration caches
+
+    start = time.perf_counter()
+    renderer.render_many([(profile, f"Candidate {i}") for i in range(documents)])
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    pdf_bytes = renderer.render(profile, user_name="Memory Probe")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"documents": documents, "pdfs_per_s": round(documents / elapsed, 1),
+            "peak_kb_per_doc": round(peak / 1024, 1), "pdf_kb": round(len(pdf_bytes) / 1024, 1)}
+
+
+if __name__ == "__main__":
+    print(benchmark())
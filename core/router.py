@@ -0,0 +1,321 @@
+"""
+Latency-aware routing over the Gemini fallback list.
+
+Per model the router keeps an EWMA of latency and error rate plus a window of recent
+latencies. Each request goes to the best-scoring model whose circuit is closed. If that
+model has not answered within its recent p95 latency, the same request is also sent to
+the next model (a hedge) and whichever answers first wins. After
+ITHUBA_BREAKER_FAILURES consecutive failures a model's circuit opens and it is skipped
+for ITHUBA_BREAKER_COOLDOWN seconds. After that it is half-open: the next request it
+gets decides whether it comes back.
+
+Streams are hedged on time to first chunk. Once a chunk has been yielded the winning
+model streams alone, so a failure mid-stream is raised instead of failed over.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.ratelimit import is_rate_limited
+from core.telemetry import classify
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+Routed = namedtuple("Routed", "model result attempts")
+
+
+class CircuitOpenError(Exception):
+    """Every model's circuit is open; nothing is worth calling until a cooldown ends."""
+
+
+class ModelStats:
+    def __init__(self, name, alpha=0.3, window=50):
+        self.name = name
+        self.alpha = alpha
+        # kind ("complete" or "first_chunk") -> EWMA seconds / recent samples
+        self.ewma = {}
+        self.recent = {}
+        self.window = window
+        self.error_rate = 0.0
+        self.failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.throttled = 0
+
+    def observe(self, kind, seconds):
+        previous = self.ewma.get(kind)
+        self.ewma[kind] = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+        self.recent.setdefault(kind, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, kind):
+        samples = sorted(self.recent.get(kind, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def score(self, kind):
+        """Expected seconds per useful answer; None until the model has been measured."""
+        latency = self.ewma.get(kind)
+        if latency is None:
+            return None
+        return latency / max(0.05, 1.0 - self.error_rate)
+
+    def to_dict(self):
+        ewma = self.ewma.get("first_chunk", self.ewma.get("complete"))
+        p95 = self.p95("first_chunk") or self.p95("complete")
+        return {
+            "model": self.name,
+            "state": self.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "ewma_ms": round(ewma * 1000, 1) if ewma is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "hedges": self.hedges,
+            "throttled": self.throttled,
+        }
+
+
+class ModelRouter:
+    def __init__(self, model_names, factory, hedge=True, min_hedge_delay=1.0, default_hedge_delay=8.0,
+                 hedge_multiplier=1.0, max_hedges=1, failure_threshold=3, cooldown=30.0, max_workers=16):
+        self.model_names = list(model_names)
+        self.factory = factory
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        # Used until a model has enough samples for a meaningful p95
+        self.default_hedge_delay = default_hedge_delay
+        self.hedge_multiplier = hedge_multiplier
+        self.max_hedges = max_hedges
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._stats = {name: ModelStats(name) for name in self.model_names}
+        self._models = {}
+        self._lock = threading.Lock()
+        # Losing hedges keep running until their provider call returns, so the pool is shared
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ithuba-router")
+
+    @classmethod
+    def from_env(cls, model_names, factory):
+        return cls(
+            model_names,
+            factory,
+            hedge=os.getenv("ITHUBA_HEDGE", "1") != "0",
+            min_hedge_delay=float(os.getenv("ITHUBA_HEDGE_MIN_DELAY", "1.0")),
+            default_hedge_delay=float(os.getenv("ITHUBA_HEDGE_DEFAULT_DELAY", "8.0")),
+            hedge_multiplier=float(os.getenv("ITHUBA_HEDGE_MULTIPLIER", "1.0")),
+            max_hedges=int(os.getenv("ITHUBA_HEDGE_MAX", "1")),
+            failure_threshold=int(os.getenv("ITHUBA_BREAKER_FAILURES", "3")),
+            cooldown=float(os.getenv("ITHUBA_BREAKER_COOLDOWN", "30")),
+        )
+
+    @classmethod
+    def pinned(cls, model, name="pinned"):
+        """A router over one ready-made model object (tests, or a caller that wants no routing)."""
+        return cls([name], lambda _: model, hedge=False, max_workers=4)
+
+    @property
+    def primary(self):
+        return self.model_names[0]
+
+    def model(self, name):
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.factory(name)
+            return self._models[name]
+
+    def prefer(self, name):
+        """Moves name to the front of the fallback order (e.g. after a health check)."""
+        with self._lock:
+            if name in self.model_names:
+                self.model_names.remove(name)
+            self.model_names.insert(0, name)
+            self._stats.setdefault(name, ModelStats(name))
+
+    def candidates(self, kind="complete"):
+        """Models worth calling: measured ones by score, then unmeasured ones in fallback-list order."""
+        now = time.time()
+        with self._lock:
+            available = []
+            for position, name in enumerate(self.model_names):
+                stats = self._stats[name]
+                if stats.state == OPEN and now - stats.opened_at >= self.cooldown:
+                    stats.state = HALF_OPEN
+                if stats.state != OPEN:
+                    score = stats.score(kind)
+                    available.append((score is None, score or 0.0, position, name))
+        return [name for *_, name in sorted(available)]
+
+    def hedge_delay(self, name, kind="complete"):
+        with self._lock:
+            stats = self._stats[name]
+            samples = len(stats.recent.get(kind, ()))
+            p95 = stats.p95(kind)
+        if samples < 5:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95 * self.hedge_multiplier)
+
+    def _record(self, name, kind, seconds, error=None):
+        with self._lock:
+            stats = self._stats[name]
+            stats.calls += 1
+            if error is not None and is_rate_limited(error):
+                # Throttling (ours or the provider's quota) is not a model failure: leave score and circuit alone
+                stats.throttled += 1
+                return
+            failed = error is not None and classify(error) != "invalid_input"
+            stats.error_rate = stats.alpha * failed + (1 - stats.alpha) * stats.error_rate
+            if not failed:
+                stats.observe(kind, seconds)
+                stats.failures = 0
+                stats.state = CLOSED
+                return
+            stats.errors += 1
+            stats.failures += 1
+            if stats.state == HALF_OPEN or stats.failures >= self.failure_threshold:
+                stats.state = OPEN
+                stats.opened_at = time.time()
+
+    def _timed(self, name, request):
+        started = time.perf_counter()
+        try:
+            result = request(self.model(name))
+        except Exception as e:
+            self._record(name, "complete", time.perf_counter() - started, e)
+            raise
+        self._record(name, "complete", time.perf_counter() - started)
+        return result
+
+    def call(self, request):
+        """
+        Runs request(model) on the best model, hedging and failing over down the list.
+        Returns Routed(model name, result, models tried); raises the last error if all fail.
+        """
+        candidates = self.candidates("complete")
+        if not candidates:
+            raise CircuitOpenError("All Gemini models are temporarily unavailable.")
+
+        in_flight = {}
+        launched = 0
+        hedges = 0
+        last_error = None
+
+        def launch():
+            nonlocal launched
+            name = candidates[launched]
+            in_flight[self._pool.submit(self._timed, name, request)] = name
+            launched += 1
+            return name
+
+        current = launch()
+        while in_flight:
+            can_hedge = self.hedge and hedges < self.max_hedges and launched < len(candidates)
+            done, _ = wait(in_flight, timeout=self.hedge_delay(current) if can_hedge else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                current = launch()
+                hedges += 1
+                with self._lock:
+                    self._stats[current].hedges += 1
+                continue
+            for future in done:
+                name = in_flight.pop(future)
+                try:
+                    return Routed(name, future.result(), launched)
+                except Exception as e:
+                    if classify(e) == "invalid_input":
+                        raise  # the prompt or response is the problem; another model will not help
+                    last_error = e
+            if not in_flight and launched < len(candidates):
+                current = launch()
+        raise last_error
+
+    def stream(self, request):
+        """
+        Yields Routed(model name, chunk, models tried) from request(model), an iterable of
+        chunks. Hedges on time to first chunk; abandoned streams stop at their next chunk.
+        """
+        candidates = self.candidates("first_chunk")
+        if not candidates:
+            raise CircuitOpenError("All Gemini models are temporarily unavailable.")
+
+        events = queue.Queue()
+        cancelled = threading.Event()
+        active = set()
+        launched = 0
+        hedges = 0
+        winner = None
+        last_error = None
+
+        def pump(name):
+            started = time.perf_counter()
+            first = True
+            try:
+                for chunk in request(self.model(name)):
+                    if first:
+                        self._record(name, "first_chunk", time.perf_counter() - started)
+                        first = False
+                    events.put(("chunk", name, chunk))
+                    if cancelled.is_set() and winner != name:
+                        return
+                if first:
+                    self._record(name, "first_chunk", time.perf_counter() - started)
+                events.put(("done", name, None))
+            except Exception as e:
+                self._record(name, "first_chunk", time.perf_counter() - started, e)
+                events.put(("error", name, e))
+
+        def launch():
+            nonlocal launched
+            name = candidates[launched]
+            active.add(name)
+            self._pool.submit(pump, name)
+            launched += 1
+            return name
+
+        current = launch()
+        try:
+            while True:
+                can_hedge = winner is None and self.hedge and hedges < self.max_hedges and launched < len(candidates)
+                try:
+                    kind, name, payload = events.get(timeout=self.hedge_delay(current, "first_chunk") if can_hedge else None)
+                except queue.Empty:
+                    current = launch()
+                    hedges += 1
+                    with self._lock:
+                        self._stats[current].hedges += 1
+                    continue
+
+                if winner is None:
+                    if kind == "error":
+                        active.discard(name)
+                        if classify(payload) == "invalid_input":
+                            raise payload
+                        last_error = payload
+                        if not active:
+                            if launched >= len(candidates):
+                                raise last_error
+                            current = launch()
+                        continue
+                    winner = name
+                    cancelled.set()
+                if name != winner:
+                    continue
+                if kind == "chunk":
+                    yield Routed(name, payload, launched)
+                elif kind == "done":
+                    return
+                else:
+                    raise payload
+        finally:
+            cancelled.set()
+
+    def stats(self):
+        with self._lock:
+            return [self._stats[name].to_dict() for name in self.model_names]
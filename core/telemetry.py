@@ -0,0 +1,182 @@
+"""
+Per-stage tracing for the CV pipeline.
+
+    with tracer.span("generate", model=self.model_name) as span:
+        ...
+        span.set(cache_hit=True, output_chars=len(text))
+
+Finished spans are kept in a bounded ring buffer (for the debug panel), folded into
+per-stage histograms (for Prometheus text export) and, when ITHUBA_TRACE_LOG is set,
+written as one JSON object per line to the "ithuba.trace" logger.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger("ithuba.trace")
+if os.getenv("ITHUBA_TRACE_LOG"):
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+PROVIDER_MODULES = ("groq", "google", "httpx", "grpc")
+
+
+def classify(error):
+    """Failure outcome label: provider-side errors are kept apart from our own bugs."""
+    module = type(error).__module__ or ""
+    if module.split(".")[0] in PROVIDER_MODULES or isinstance(error, (TimeoutError, ConnectionError)):
+        return "provider_error"
+    if isinstance(error, ValueError):
+        return "invalid_input"
+    return "error"
+
+
+class Span:
+    def __init__(self, name, parent=None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.outcome = "ok"
+        self.error_type = None
+        self.start = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error, outcome=None):
+        """Marks a handled failure; the engine returns error strings instead of raising."""
+        self.outcome = outcome or classify(error)
+        self.error_type = type(error).__name__
+
+    def to_dict(self):
+        record = {
+            "span": self.name,
+            "parent": self.parent,
+            "start": round(self.start, 3),
+            "duration_ms": round((self.duration or 0) * 1000, 2),
+            "outcome": self.outcome,
+        }
+        if self.error_type:
+            record["error_type"] = self.error_type
+        record.update(self.attributes)
+        return record
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.total += 1
+        self.sum += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+
+
+class Tracer:
+    def __init__(self, max_spans=500):
+        self._spans = deque(maxlen=max_spans)
+        self._histograms = {}
+        self._cache_hits = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span = Span(name, parent=stack[-1].name if stack else None, **attributes)
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except GeneratorExit:
+            span.outcome = "cancelled"
+            raise
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            # A streaming generator can be suspended with other spans opened above it
+            if span in stack:
+                stack.remove(span)
+            self._record(span)
+
+    def _record(self, span):
+        with self._lock:
+            self._spans.append(span)
+            histogram = self._histograms.setdefault((span.name, span.outcome), _Histogram())
+            histogram.observe(span.duration)
+            if span.attributes.get("cache_hit"):
+                self._cache_hits[span.name] = self._cache_hits.get(span.name, 0) + 1
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(span.to_dict(), default=str))
+
+    def recent(self, limit=50):
+        with self._lock:
+            return [span.to_dict() for span in list(self._spans)[-limit:]]
+
+    def summary(self):
+        """Per-stage count, mean and p95 (ms) over the spans still in the ring buffer."""
+        with self._lock:
+            spans = list(self._spans)
+        by_stage = {}
+        for span in spans:
+            by_stage.setdefault(span.name, []).append(span)
+        rows = []
+        for name, stage_spans in sorted(by_stage.items()):
+            durations = sorted(s.duration for s in stage_spans)
+            rows.append({
+                "stage": name,
+                "count": len(durations),
+                "mean_ms": round(sum(durations) / len(durations) * 1000, 1),
+                "p95_ms": round(durations[min(len(durations) - 1, int(0.95 * len(durations)))] * 1000, 1),
+                "errors": sum(1 for s in stage_spans if s.outcome != "ok"),
+                "cache_hits": sum(1 for s in stage_spans if s.attributes.get("cache_hit")),
+            })
+        return rows
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP ithuba_stage_duration_seconds Pipeline stage latency.",
+            "# TYPE ithuba_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            cache_hits = sorted(self._cache_hits.items())
+        for (name, outcome), histogram in histograms:
+            labels = f'stage="{name}",outcome="{outcome}"'
+            for bound, count in zip(BUCKETS, histogram.counts):
+                lines.append(f'ithuba_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'ithuba_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.total}')
+            lines.append(f"ithuba_stage_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"ithuba_stage_duration_seconds_count{{{labels}}} {histogram.total}")
+        lines.append("# HELP ithuba_cache_hits_total Stage calls served from cache.")
+        lines.append("# TYPE ithuba_cache_hits_total counter")
+        for name, hits in cache_hits:
+            lines.append(f'ithuba_cache_hits_total{{stage="{name}"}} {hits}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._histograms.clear()
+            self._cache_hits.clear()
+
+
+tracer = Tracer()
@@ -1,7 +1,82 @@
+import time
+
 from streamlit.testing.v1 import AppTest
 
 def test_app_startup():
     at = AppTest.from_file("app/main.py").run()
     assert at.title[0].value == "Ithuba" 
     assert at.sidebar
-    assert not at.exception
\ No newline at end of file
+    assert not at.exception
+
+def _generate(at):
+    at.button[0].click().run()
+    # Jobs are polled by a fragment, which AppTest does not rerun on its own
+    for _ in range(100):
+        if not at.session_state.jobs:
+            break
+        time.sleep(0.05)
+        at.run()
+
+
+def test_extra_language_costs_one_call_per_language():
+    import streamlit as st
+    from benchmarks.fakes import fake_providers
+
+    with fake_providers(groq_latency=0, gemini_latency=0) as (_, models):
+        st.cache_resource.clear()
+        at = AppTest.from_file("app/main.py", default_timeout=30).run()
+        at.text_area[0].set_value("I have run a spaza shop in Tembisa for six years.")
+        at.multiselect[0].set_value(["isiZulu"])
+        _generate(at)
+        st.cache_resource.clear()
+
+    # One structured extraction (English is laid out locally) and one isiZulu translation
+    assert sum(model.latency.calls for model in models.values()) == 2
+    assert not at.exception
+    assert at.session_state.pdf_handle is not None
+    assert list(at.session_state.translations) == ["isiZulu"]
+
+
+def test_failed_jd_update_keeps_the_previous_profile():
+    from unittest import mock
+
+    import streamlit as st
+    from benchmarks.fakes import FakeGeminiModel, ProviderError, fake_providers
+
+    with fake_providers(groq_latency=0, gemini_latency=0):
+        st.cache_resource.clear()
+        at = AppTest.from_file("app/main.py", default_timeout=30).run()
+        at.text_area[0].set_value("I have run a spaza shop in Tembisa for six years.")
+        at.text_area[1].set_value("Cashier")
+        _generate(at)
+        profile, basis = at.session_state.profile_handle, at.session_state.profile_basis
+
+        at.text_area[1].set_value("Forklift operator")
+        with mock.patch.object(FakeGeminiModel, "generate_content", side_effect=ProviderError("503 down")):
+            _generate(at)
+        st.cache_resource.clear()
+
+    assert not at.exception
+    assert any("Error during generation" in error.value for error in at.error)
+    assert at.session_state.profile_handle == profile
+    assert at.session_state.profile_basis == basis
+
+
+def test_story_edits_survive_reruns_without_the_artifact_store():
+    import streamlit as st
+    from benchmarks.fakes import fake_providers
+
+    with fake_providers(groq_latency=0, gemini_latency=0):
+        st.cache_resource.clear()
+        at = AppTest.from_file("app/main.py", default_timeout=30)
+        at.session_state["story"] = "I fix cars in Soweto."  # as a finished transcription leaves it
+        at.run()
+        assert at.text_area[0].value == "I fix cars in Soweto."
+
+        at.text_area[0].set_value("I fix cars and bakkies in Soweto.").run()
+        at.run()
+        st.cache_resource.clear()  # drops the artifact store along with every other shared resource
+        at.run()
+
+    assert not at.exception
+    assert at.text_area[0].value == "I fix cars and bakkies in Soweto."
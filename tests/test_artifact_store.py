@@ -0,0 +1,71 @@
+import os
+import time
+from unittest import mock
+
+from core.cache import ArtifactStore
+from core.render import SAMPLE_PROFILE
+
+
+def test_round_trips_text_and_bytes_with_content_handles():
+    store = ArtifactStore(directory=None)
+    text_handle = store.put(SAMPLE_PROFILE)
+    pdf_handle = store.put(b"%PDF-1.4 binary")
+
+    assert store.get(text_handle) == SAMPLE_PROFILE
+    assert store.get(pdf_handle) == b"%PDF-1.4 binary"
+    assert store.put(SAMPLE_PROFILE) == text_handle
+    assert store.stats()["entries"] == 2
+    assert store.get(None, "") == ""
+
+
+def test_compresses_text_but_keeps_incompressible_bytes_raw():
+    store = ArtifactStore(directory=None)
+    store.put(SAMPLE_PROFILE * 20)
+    assert store.stats()["memory_bytes"] < len(SAMPLE_PROFILE.encode("utf-8"))
+
+    noise = os.urandom(4096)
+    handle = store.put(noise)
+    assert store.get(handle) == noise
+
+
+def test_budget_spills_least_recently_used_to_disk(tmp_path):
+    store = ArtifactStore(max_bytes=10_000, directory=str(tmp_path))
+    blobs = [os.urandom(4000) for _ in range(3)]
+    handles = [store.put(blob) for blob in blobs]
+
+    assert store.stats()["memory_bytes"] <= 10_000
+    assert store.stats()["spills"] == 1
+    assert store.get(handles[0]) == blobs[0]
+    assert store.stats()["disk_hits"] == 1
+
+
+def test_without_disk_overflow_is_dropped():
+    store = ArtifactStore(max_bytes=5_000, directory=None)
+    first = store.put(os.urandom(4000))
+    store.put(os.urandom(4000))
+
+    assert store.get(first) is None
+    assert store.stats()["drops"] == 1
+
+
+def test_expired_handles_return_default():
+    store = ArtifactStore(directory=None, ttl=5)
+    handle = store.put("# CV")
+    with mock.patch("core.cache.time.time", return_value=time.time() + 10):
+        assert store.get(handle) is None
+    assert store.stats()["memory_bytes"] == 0
+
+
+def test_disk_tier_is_opt_in_and_reads_do_not_extend_ttl(tmp_path):
+    with mock.patch.dict(os.environ, {"ITHUBA_ARTIFACT_DIR": ""}):
+        assert ArtifactStore.from_env().disk is None
+
+    store = ArtifactStore(max_bytes=5_000, directory=str(tmp_path), ttl=60)
+    first = store.put(os.urandom(4000))
+    store.put(os.urandom(4000))  # spills the first one to disk
+    later = time.time() + 40
+    with mock.patch("core.cache.time.time", return_value=later):
+        assert store.get(first) is not None  # promoted from disk, still 40s old
+        store.put(os.urandom(4000))  # spills it again
+    with mock.patch("core.cache.time.time", return_value=later + 30):
+        assert store.get(first) is None
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import fake_providers
+from core.async_engine import AsyncIthubaEngine
+
+
+def _run(scenario, **engine_options):
+    async def main():
+        async with AsyncIthubaEngine(**engine_options) as engine:
+            return await scenario(engine)
+    return asyncio.run(main())
+
+
+def test_build_profile_runs_offline_and_caches():
+    async def scenario(engine):
+        first = await engine.build_profile(b"RIFF....WAVE", job_description="Retail supervisor")
+        second = await engine.build_profile(b"RIFF....WAVE", job_description="Retail supervisor")
+        return first, second
+
+    with fake_providers(groq_latency=0, gemini_latency=0) as (groq, models):
+        first, second = _run(scenario)
+
+    assert "spaza" in first["transcript"] and first["profile"].startswith("# ")
+    assert second == first
+    assert groq.latency.calls == 1
+    assert sum(model.latency.calls for model in models.values()) == 1
+
+
+def test_stream_yields_chunks_and_releases_the_semaphore():
+    async def scenario(engine):
+        chunks = [chunk async for chunk in engine.stream_professional_profile("I sell airtime")]
+        return chunks, engine._semaphore._value
+
+    with fake_providers(groq_latency=0, gemini_latency=0):
+        chunks, free_slots = _run(scenario, max_concurrency=2)
+
+    assert len(chunks) > 1 and "".join(chunks).startswith("# ")
+    assert free_slots == 2
+
+
+class _Chunk:
+    text = "# CV\n"
+
+
+class CountingModel:
+    """Records how many generate_content_async calls overlap."""
+    model_name = "gemini-test"
+
+    def __init__(self, fail_stream=False):
+        self.active = 0
+        self.peak = 0
+        self.fail_stream = fail_stream
+
+    async def generate_content_async(self, prompt, stream=False, **_):
+        if stream:
+            return self._stream()
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return _Chunk()
+
+    async def _stream(self):
+        yield _Chunk()
+        if self.fail_stream:
+            raise ConnectionError("stream reset")
+
+
+def test_semaphore_bounds_provider_calls_in_flight():
+    model = CountingModel()
+
+    async def scenario(engine):
+        engine.llm = model
+        stories = [f"I have sold airtime for {years} years" for years in range(6)]
+        return await asyncio.gather(*(engine.generate_professional_profile(story) for story in stories))
+
+    with fake_providers(groq_latency=0, gemini_latency=0):
+        profiles = _run(scenario, max_concurrency=2)
+
+    assert profiles == ["# CV\n"] * 6
+    assert model.peak == 2
+
+
+def test_stream_failure_raises_and_frees_its_slot():
+    async def scenario(engine):
+        engine.llm = CountingModel(fail_stream=True)
+        received = []
+        with pytest.raises(ConnectionError):
+            async for chunk in engine.stream_professional_profile("I sell airtime"):
+                received.append(chunk)
+        return received, engine._semaphore._value, len(engine.profile_cache.profiles)
+
+    with fake_providers(groq_latency=0, gemini_latency=0):
+        received, free_slots, cached = _run(scenario, max_concurrency=1)
+
+    assert received == ["# CV\n"]
+    assert free_slots == 1 and cached == 0
@@ -0,0 +1,31 @@
+from core.ats import extract_keywords, professional_terms, score_profile
+from core.engine import prepare_job_description
+
+JD = """
+Delivery Driver wanted. Requirements: Code 10 driver's licence and PDP.
+Route planning, stock control and customer service are essential.
+Cash handling on deliveries. Forklift experience an advantage. Deliveries across Gauteng.
+"""
+
+
+def test_extract_keywords_ranks_indexed_terms():
+    terms = [k.term for k in extract_keywords(JD)]
+    assert terms[0] == "deliveries"
+    assert {"code 10", "pdp", "route planning", "customer service"} <= set(terms)
+    assert "requirements" not in terms
+
+
+def test_prompt_gets_keywords_not_the_whole_ad():
+    prepared = prepare_job_description(JD)
+    assert len(prepared) < len(JD)
+    assert "route planning" in prepared
+    assert prepare_job_description("Cashier") == "Cashier"
+
+
+def test_score_profile_and_informal_terms():
+    keywords = extract_keywords(JD)
+    profile = "## Skills\n- Route Planning\n- Customer Service\n- Code 10 licence"
+    result = score_profile(profile, keywords)
+    assert set(result["matched"]) == {"route planning", "customer service", "code 10"}
+    assert 0 < result["score"] < 1
+    assert professional_terms("I did piece-work and used my bakkie")["bakkie"] == "Light Commercial Vehicle Logistics"
@@ -0,0 +1,75 @@
+import io
+import wave
+
+import numpy as np
+
+from core.audio import AudioPreprocessor, encode_wav, split_segments, trim_silence
+from core.cache import TranscriptionCache
+from core.engine import IthubaEngine
+
+
+def _speech_with_pauses(rate=16000, bursts=4, burst_seconds=3, pause_seconds=1):
+    tone = (np.sin(np.arange(rate * burst_seconds) * 0.05) * 8000).astype(np.int16)
+    pause = np.zeros(rate * pause_seconds, dtype=np.int16)
+    pcm = np.concatenate([np.concatenate([tone, pause]) for _ in range(bursts)])
+    return encode_wav(pcm.tobytes(), rate, 1, 2)
+
+
+def _duration(wav_bytes):
+    with wave.open(io.BytesIO(wav_bytes)) as reader:
+        return reader.getnframes() / reader.getframerate()
+
+
+def test_split_cuts_in_pauses_and_respects_max():
+    audio = _speech_with_pauses()
+    segments = list(split_segments(io.BytesIO(audio), max_seconds=6, min_seconds=2))
+
+    assert len(segments) == 4
+    assert all(_duration(s) <= 6 for s in segments)
+    # Only the trailing pause, which holds no speech, is dropped
+    assert abs(sum(_duration(s) for s in segments) - _duration(audio)) < 1
+
+
+def test_long_audio_transcribes_segments_in_order():
+    class FakeTranscriptions:
+        def create(self, file, model, prompt, response_format):
+            return file[0]
+
+    engine = IthubaEngine.__new__(IthubaEngine)
+    engine.transcription_cache = TranscriptionCache()
+    engine.groq_client = type("Groq", (), {"audio": type("Audio", (), {"transcriptions": FakeTranscriptions()})()})()
+
+    text = engine.transcribe_long_audio(_speech_with_pauses(), max_segment_seconds=6, max_workers=3)
+    assert text == "segment_0.wav segment_1.wav segment_2.wav"
+    # The stitched result is cached under the whole recording
+    assert engine.transcribe_long_audio(_speech_with_pauses(), max_segment_seconds=6) == text
+
+
+def test_preprocess_downmixes_resamples_and_trims():
+    rate = 44100
+    tone = (np.sin(np.arange(rate * 2) * 0.05) * 8000).astype(np.int16)
+    pcm = np.concatenate([np.zeros(rate, np.int16), tone, np.zeros(rate * 3, np.int16), tone, np.zeros(rate, np.int16)])
+    recording = encode_wav(np.repeat(pcm, 2).tobytes(), rate, 2, 2)
+
+    prep = AudioPreprocessor(max_pause=0.6, padding=0.2)
+    prepared = prep.process("audio.wav", recording)
+    with wave.open(io.BytesIO(prepared.payload)) as reader:
+        assert (reader.getnchannels(), reader.getframerate()) == (1, 16000)
+    # 4 s of speech + a 3 s pause cut to 0.6 s + 0.2 s padding at each end
+    assert abs(prepared.output_seconds - 5.0) < 0.1 and prepared.input_seconds == 9.0
+    assert prep.stats()["bytes_saved"] == len(recording) - len(prepared.payload) > 0
+
+
+def test_preprocess_leaves_silence_and_unknown_audio_alone(monkeypatch):
+    silence = np.zeros(1600, dtype=np.float32)
+    assert trim_silence(silence, 16000) is silence
+
+    prep = AudioPreprocessor()
+    assert prep.process("audio.m4a", b"not audio").payload == b"not audio"
+    assert prep.stats()["skipped"] == 1
+
+    # Compressed uploads are not decoded at all when the target is WAV
+    decodes = []
+    monkeypatch.setattr("core.audio._decode_pcm", lambda payload: decodes.append(payload))
+    prep.process("voice.mp3", b"ID3\x04fake-mp3-frames")
+    assert decodes == []
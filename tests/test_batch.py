@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from core.batch import BatchRunner, load_candidates
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe_audio(self, audio_data, lang_name="English"):
+        self.calls += 1
+        return f"I run a spaza shop. {audio_data.read().decode()}"
+
+    def redact_pii(self, text):
+        return text
+
+    def generate_professional_profile(self, raw_text, target_language="English", job_description=""):
+        return "# Name\n## Professional Summary\nRetail operator."
+
+
+def test_batch_writes_pdfs_and_resumes(tmp_path):
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir()
+    for name in ("thandi", "pieter"):
+        (audio_dir / f"{name}.wav").write_bytes(name.encode())
+    out = tmp_path / "out"
+
+    engine = FakeEngine()
+    runner = BatchRunner(str(out), workers=2, engine=engine)
+    results, _ = runner.run(load_candidates(str(audio_dir)))
+
+    assert {r["status"] for r in results} == {"ok"}
+    assert (out / "Ithuba_CV_thandi.pdf").read_bytes().startswith(b"%PDF")
+    assert len((out / "results.jsonl").read_text().splitlines()) == 2
+    assert "transcribe" in runner.throughput_report(1.0)
+
+    rerun = BatchRunner(str(out), workers=2, engine=engine)
+    results, _ = rerun.run(load_candidates(str(audio_dir)))
+    assert results == []
+    assert engine.calls == 2
+    assert json.loads((out / "results.jsonl").read_text().splitlines()[0])["status"] == "ok"
+
+
+def test_candidate_ids_follow_relative_paths_and_reject_collisions(tmp_path):
+    for folder in ("site_a", "site_b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "thandi.wav").write_bytes(b"x")
+    manifest = tmp_path / "cohort.csv"
+    manifest.write_text("audio,name\nsite_a/thandi.wav,Thandi A\nsite_b/thandi.wav,Thandi B\n")
+    assert [c["id"] for c in load_candidates(manifest=str(manifest))] == ["site_a_thandi", "site_b_thandi"]
+
+    (tmp_path / "site_a" / "thandi.m4a").write_bytes(b"x")
+    with pytest.raises(ValueError, match="thandi"):
+        load_candidates(str(tmp_path / "site_a"))
@@ -0,0 +1,19 @@
+from benchmarks.fakes import fake_providers
+from benchmarks.run import measure
+from core.engine import IthubaEngine
+
+
+def test_engine_runs_offline_against_fakes():
+    with fake_providers(groq_latency=0, gemini_latency=0) as (groq, models):
+        engine = IthubaEngine()
+        assert "spaza" in engine.transcribe_audio(b"RIFF....WAVE")
+        assert engine.generate_professional_profile("I sell airtime").startswith("# ")
+        assert "".join(engine.stream_professional_profile("I sell airtime", force=True)).startswith("# ")
+        assert groq.latency.calls == 1
+
+
+def test_measure_reports_percentiles_and_failures():
+    with fake_providers(groq_latency=0, failure_rate=1.0) as (groq, _):
+        result = measure("always-fails", lambda i: groq.create(None, None, None), iterations=5)
+    assert result["failures"] == 5
+    assert {"p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "peak_mem_kb"} <= set(result)
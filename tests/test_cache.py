@@ -0,0 +1,28 @@
+from core.cache import LRUCache, TranscriptionCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_transcription_cache_key_includes_prompt():
+    audio = b"RIFF....WAVE"
+    assert TranscriptionCache.key(audio, "English") != TranscriptionCache.key(audio, "isiZulu")
+
+
+def test_transcription_cache_disk_tier_and_counters(tmp_path):
+    cache = TranscriptionCache(directory=str(tmp_path))
+    key = cache.key(b"audio", "prompt")
+    assert cache.get(key) is None
+    cache.put(key, "I sell vetkoek at the taxi rank.")
+
+    fresh = TranscriptionCache(directory=str(tmp_path))
+    assert fresh.get(key) == "I sell vetkoek at the taxi rank."
+    assert cache.stats()["misses"] == 1
+    assert fresh.stats()["hits"] == 1
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from core.engine import IthubaEngine, load_model_choice, save_model_choice
+
+
+def test_engine_import_and_construction_defer_provider_sdks():
+    probe = (
+        "import sys; from core.engine import IthubaEngine; IthubaEngine(health_check=False); "
+        "import core.utils; print([m for m in ('groq', 'google.generativeai', 'fpdf') if m in sys.modules])"
+    )
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(__file__))).stdout
+    assert output.strip() == "[]"
+
+
+def test_model_choice_round_trips_and_expires(tmp_path, monkeypatch):
+    monkeypatch.setenv("ITHUBA_MODEL_STATE", str(tmp_path / "model.json"))
+    assert load_model_choice() is None
+
+    save_model_choice("gemini-2.0-flash")
+    assert load_model_choice() == "gemini-2.0-flash"
+    assert load_model_choice(model_names=["gemini-2.5-flash"]) is None
+
+    with mock.patch("core.engine.time.time", return_value=time.time() + 10):
+        assert load_model_choice(ttl=5) is None
+
+
+def test_engine_starts_on_persisted_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("ITHUBA_MODEL_STATE", str(tmp_path / "model.json"))
+    save_model_choice("gemini-1.5-flash")
+    assert IthubaEngine(health_check=False).model_name == "gemini-1.5-flash"
+
+
+def test_health_check_switches_to_a_served_model_and_persists_it(tmp_path, monkeypatch):
+    monkeypatch.setenv("ITHUBA_MODEL_STATE", str(tmp_path / "model.json"))
+    engine = IthubaEngine(health_check=False)
+
+    def get_model(name):
+        if name != "models/gemini-2.0-flash":
+            raise RuntimeError("404 model not found")
+
+    with mock.patch("google.generativeai.get_model", get_model), \
+            mock.patch("google.generativeai.configure"), \
+            mock.patch("google.generativeai.GenerativeModel", lambda name: name):
+        assert engine.check_model_health() == "gemini-2.0-flash"
+        assert engine.llm == "gemini-2.0-flash"
+
+    assert engine.model_name == "gemini-2.0-flash"
+    assert load_model_choice() == "gemini-2.0-flash"
@@ -0,0 +1,48 @@
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+from core.fonts import load_font
+from core.render import PdfRenderer, _latin
+
+TEXT = "# Name\n\n## Summary\nUmšomi wa ṱhoḓea."
+
+
+def _font(path):
+    """A tiny TTF with a square glyph for ASCII plus 'š' and 'ṱ' (no 'ḓ')."""
+    chars = [chr(c) for c in range(0x20, 0x7F)] + ["š", "ṱ"]
+    names = [".notdef"] + [f"g{ord(c)}" for c in chars]
+    pen = TTGlyphPen(None)
+    pen.moveTo((100, 0)); pen.lineTo((100, 500)); pen.lineTo((400, 500)); pen.lineTo((400, 0)); pen.closePath()
+    square = pen.glyph()
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap({ord(c): f"g{ord(c)}" for c in chars})
+    builder.setupGlyf({name: square for name in names})
+    builder.setupHorizontalMetrics({name: (500, 100) for name in names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": "Tiny", "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    builder.save(str(path))
+    return str(path)
+
+
+def test_unicode_font_embedded_only_when_needed(tmp_path):
+    path = _font(tmp_path / "tiny.ttf")
+    renderer = PdfRenderer(unicode_fonts=(path, path))
+    unicode_pdf = renderer.render(TEXT, user_name="Ṱhandi")
+    latin_pdf = renderer.render("# Name\n\nPlain text only.", user_name="Thandi")
+    assert b"FontFile2" in unicode_pdf
+    assert b"FontFile2" not in latin_pdf and len(latin_pdf) < len(unicode_pdf)
+
+    font = load_font(path, "")
+    assert load_font(path, "") is font
+    assert font.prepare("ṱhoḓea") == "ṱhodea"  # the font has no 'ḓ'
+
+
+def test_max_kb_falls_back_to_core_fonts(tmp_path):
+    path = _font(tmp_path / "tiny.ttf")
+    renderer = PdfRenderer(unicode_fonts=(path, path))
+    capped = renderer.render(TEXT, max_kb=0.5)
+    assert capped.startswith(b"%PDF") and b"FontFile2" not in capped
+    assert _latin("Ñandza ê ṱ") == "Ñandza ê t"
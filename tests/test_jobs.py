@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from core.jobs import DONE, FAILED, JobExecutor, QueueFullError
+
+
+def _wait(executor, job_id, timeout=2.0):
+    deadline = time.time() + timeout
+    while not executor.get(job_id).finished:
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return executor.get(job_id)
+
+
+def test_job_runs_in_background_and_reports_result():
+    executor = JobExecutor(max_workers=2)
+    job = _wait(executor, executor.submit("transcribe", lambda audio: audio.upper(), "sawubona"))
+    assert job.status == DONE and job.result == "SAWUBONA"
+
+
+def test_generator_jobs_expose_progress_and_return_value():
+    release = threading.Event()
+
+    def stream():
+        yield "# CV "
+        release.wait(2)
+        yield "body"
+        return {"profile": "# CV body"}
+
+    executor = JobExecutor()
+    job_id = executor.submit("generate", stream)
+    time.sleep(0.05)
+    assert executor.get(job_id).partial_text == "# CV "
+    release.set()
+    assert _wait(executor, job_id).result == {"profile": "# CV body"}
+
+
+def test_identical_inputs_coalesce_while_running():
+    release = threading.Event()
+    calls = []
+
+    def slow(story):
+        calls.append(story)
+        release.wait(2)
+        return story
+
+    executor = JobExecutor()
+    key = JobExecutor.key("generate", "I run a spaza shop", "")
+    first = executor.submit("generate", slow, "I run a spaza shop", key=key)
+    second = executor.submit("generate", slow, "I run a spaza shop", key=key)
+    release.set()
+
+    assert first == second
+    _wait(executor, first)
+    assert calls == ["I run a spaza shop"]
+    assert executor.stats()["coalesced"] == 1
+    assert executor.submit("generate", slow, "I run a spaza shop", key=key) != first
+
+
+def test_full_queue_applies_backpressure():
+    release = threading.Event()
+    executor = JobExecutor(max_workers=1, max_pending=2)
+    executor.submit("generate", release.wait, 2)
+    executor.submit("generate", release.wait, 2)
+
+    with pytest.raises(QueueFullError):
+        executor.submit("generate", release.wait, 2)
+    release.set()
+    assert executor.stats()["rejected"] == 1
+
+
+def test_failures_are_reported_not_raised():
+    def boom():
+        raise ConnectionError("503")
+
+    executor = JobExecutor()
+    job = _wait(executor, executor.submit("generate", boom))
+    assert job.status == FAILED and "503" in job.error
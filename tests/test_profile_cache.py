@@ -0,0 +1,165 @@
+from core.cache import ProfileCache
+from core.engine import IthubaEngine
+
+
+class FakeModel:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": f"# CV v{len(self.prompts)}"})()
+
+
+def _engine():
+    engine = IthubaEngine.__new__(IthubaEngine)
+    engine.profile_cache = ProfileCache()
+    engine.llm = FakeModel()
+    engine.model_name = "gemini-test"
+    return engine
+
+
+def test_profile_cache_hits_on_whitespace_and_pii_variants():
+    engine = _engine()
+    first = engine.generate_professional_profile("I drive a bakkie.  Call 0821234567", job_description="Driver")
+    second = engine.generate_professional_profile("I drive a bakkie.\nCall 0839876543 ", job_description="Driver")
+
+    assert first == second == "# CV v1"
+    assert "0821234567" not in engine.llm.prompts[0]
+    assert engine.profile_cache.stats()["hits"] == 1
+
+
+def test_force_bypasses_cache_and_pdf_is_cached():
+    engine = _engine()
+    engine.generate_professional_profile("I run a spaza shop")
+    assert engine.generate_professional_profile("I run a spaza shop", force=True) == "# CV v2"
+
+    renders = []
+    render = lambda text, user_name: renders.append(user_name) or b"%PDF"
+    engine.profile_cache.pdf("# CV v2", "Thandi", render)
+    engine.profile_cache.pdf("# CV v2", "Thandi", render)
+    engine.profile_cache.pdf("# CV v2", "Pieter", render)
+    assert renders == ["Thandi", "Pieter"]
+    assert engine.profile_cache.stats()["bypasses"] == 1
+
+
+class SectionModel(FakeModel):
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        reply = "## 🛠 Core Competencies\n- Forklift operation\n\n## 📈 Experience\n- Moved 200 pallets a day\n"
+        return type("Response", (), {"text": reply})()
+
+
+def test_regenerate_sections_keeps_summary_and_sends_a_smaller_prompt():
+    from core.render import SAMPLE_PROFILE, split_sections
+
+    engine = _engine()
+    engine.llm = SectionModel()
+    updated = engine.regenerate_sections(SAMPLE_PROFILE, "I run a spaza shop", job_description="Forklift driver")
+
+    sections = dict(split_sections(updated))
+    assert "Forklift operation" in sections["competencies"]
+    assert "200 pallets" in sections["experience"]
+    assert sections["summary"] == dict(split_sections(SAMPLE_PROFILE))["summary"]
+    assert "Professional Summary" not in engine.llm.prompts[0]
+
+    engine.regenerate_sections(SAMPLE_PROFILE, "I run a spaza shop", job_description="Forklift driver")
+    assert len(engine.llm.prompts) == 1
+
+
+class JsonModel(FakeModel):
+    DATA = {"summary": "Six years running a spaza shop.", "competencies": {"Operational": ["Stock control"]},
+            "experience": ["Cut stock waste by ordering weekly"], "attributes": [{"name": "Grit", "evidence": "Never closed"}]}
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        import json
+        self.prompts.append(prompt)
+        if "Translate this CV data into Sepedi" in prompt:
+            reply = dict(self.DATA, summary="Mengwaga ye tshela ke šoma lebenkeleng.", headings={"summary": "Kakaretšo"})
+        else:
+            reply = self.DATA
+        return type("Response", (), {"text": "```json\n" + json.dumps(reply, ensure_ascii=False) + "\n```"})()
+
+
+def test_fan_out_extracts_once_and_renders_each_language():
+    from core.render import split_sections
+
+    engine = _engine()
+    engine.llm = JsonModel()
+    results = engine.generate_profiles("I run a spaza shop", ["English", "Sepedi", "English"],
+                                       render=lambda text: text.encode("utf-8"))
+
+    assert list(results) == ["English", "Sepedi"]
+    # One extraction, one translation; English is laid out locally
+    assert len(engine.llm.prompts) == 2
+    assert "## 📝 Professional Summary" in results["English"]["profile"]
+    sepedi = dict(split_sections(results["Sepedi"]["profile"]))
+    assert "Kakaretšo" in sepedi["summary"] and "šoma" in sepedi["summary"]
+    assert "Stock control" in sepedi["competencies"]
+    assert results["Sepedi"]["pdf"] == results["Sepedi"]["profile"].encode("utf-8")
+
+    engine.generate_profiles("I run a spaza shop", ["Sepedi"], render=lambda text: b"%PDF")
+    assert len(engine.llm.prompts) == 2
+
+
+def test_fan_out_reports_unusable_extraction_per_language():
+    engine = _engine()
+    results = engine.generate_profiles("I run a spaza shop", ["English", "isiZulu"], render=lambda text: b"%PDF")
+    assert all(r["pdf"] is None and r["profile"].startswith("Error generating profile") for r in results.values())
+
+
+def test_failover_reply_is_cached_under_the_model_that_answered():
+    from core.router import ModelRouter
+
+    class Failing(FakeModel):
+        def generate_content(self, prompt, stream=False):
+            raise RuntimeError("503 overloaded")
+
+    backup = FakeModel()
+    engine = _engine()
+    engine._router = ModelRouter(["primary", "backup"], {"primary": Failing(), "backup": backup}.get, hedge=False)
+
+    assert engine.generate_professional_profile("I run a spaza shop") == "# CV v1"
+    primary_key = engine._cache_key("primary", "I run a spaza shop", "", "English")
+    assert engine.profile_cache.profiles.get(primary_key) is None
+    assert engine.profile_cache.profiles.get(engine._cache_key("backup", "I run a spaza shop", "", "English")) == "# CV v1"
+
+
+def test_stream_failing_midway_raises_and_caches_nothing():
+    import pytest
+
+    class Chunk:
+        text = "# CV\n"
+
+    class BrokenStream(FakeModel):
+        def generate_content(self, prompt, stream=False):
+            def chunks():
+                yield Chunk()
+                raise ConnectionError("stream reset")
+            return chunks()
+
+    engine = _engine()
+    engine.llm = BrokenStream()
+    received = []
+    with pytest.raises(ConnectionError):
+        for chunk in engine.stream_professional_profile("I run a spaza shop"):
+            received.append(chunk)
+
+    assert received == ["# CV\n"]
+    assert len(engine.profile_cache.profiles) == 0
+
+
+def test_cache_hits_when_the_router_prefers_a_faster_backup():
+    from core.router import ModelRouter
+
+    primary, backup = FakeModel(), FakeModel()
+    engine = _engine()
+    engine._router = ModelRouter(["primary", "backup"], {"primary": primary, "backup": backup}.get, hedge=False)
+    engine.router._record("primary", "complete", 2.0)
+    engine.router._record("backup", "complete", 0.5)
+
+    profiles = [engine.generate_professional_profile("I run a spaza shop") for _ in range(3)]
+
+    assert profiles == ["# CV v1"] * 3
+    assert (len(primary.prompts), len(backup.prompts)) == (0, 1)
+    assert engine.profile_cache.stats()["hits"] == 2
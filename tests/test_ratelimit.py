@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from core.ratelimit import RateLimiter, RateLimitError, TokenBucket, is_retryable, parse_limits, retry_after
+
+
+class Throttled(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after} if retry_after else {}})()
+
+
+def test_bucket_paces_after_burst_in_arrival_order():
+    bucket = TokenBucket(rpm=600, burst=2)  # one slot per 0.1 s
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.1, abs=0.02) and delays[3] == pytest.approx(0.2, abs=0.02)
+    assert bucket.depth() == 2
+    with pytest.raises(RateLimitError):
+        bucket.reserve(max_wait=0.05)
+
+
+def test_retries_honour_retry_after_and_pause_the_shared_bucket():
+    limiter = RateLimiter(retries=2, backoff=0.01, seed=1)
+    attempts = []
+
+    def request():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise Throttled(retry_after="0.1")
+        return "ok"
+
+    assert limiter.call("groq", "whisper-large-v3", request) == "ok"
+    assert attempts[1] - attempts[0] >= 0.09
+    stats = limiter.stats()[0]
+    assert stats["bucket"] == "groq/whisper-large-v3" and stats["throttled"] == 2 and stats["retries"] == 2
+    assert 'ithuba_rate_throttled_total{provider="groq",model="whisper-large-v3"} 2' in limiter.prometheus_text()
+
+
+def test_gives_up_on_other_errors_and_after_max_retries():
+    limiter = RateLimiter(retries=1, backoff=0.01, seed=1)
+    calls = []
+
+    def failing(error):
+        def request():
+            calls.append(error)
+            raise error
+        return request
+
+    with pytest.raises(ValueError):
+        limiter.call("gemini", "m", failing(ValueError("bad prompt")))
+    with pytest.raises(Throttled):
+        limiter.call("gemini", "m", failing(Throttled()))
+    assert len(calls) == 3
+
+
+def test_async_call_and_config_parsing():
+    limiter = RateLimiter(limits=parse_limits("gemini=60, gemini/flash=6"))
+    assert limiter.bucket("gemini", "flash").rpm == 6 and limiter.bucket("gemini", "pro").rpm == 60
+    assert limiter.bucket("groq", "whisper").rpm is None
+
+    async def request():
+        return "done"
+
+    assert asyncio.run(limiter.acall("gemini", "pro", request)) == "done"
+    assert is_retryable(Throttled()) and not is_retryable(ConnectionError())
+    assert retry_after(Exception("Quota exceeded. Please retry in 23.5s.")) == 23.5
+    assert retry_after(Throttled(retry_after="soon")) is None
+
+
+def test_transient_calls_retry_timeouts_and_server_errors_without_pausing_the_bucket():
+    limiter = RateLimiter(retries=2, backoff=0.01, seed=1)
+    errors = [TimeoutError("read timed out"), type("BadGateway", (Exception,), {"status_code": 502})()]
+
+    def request():
+        if errors:
+            raise errors.pop(0)
+        return "transcript"
+
+    assert limiter.call("groq", "whisper-large-v3", request, transient=True) == "transcript"
+    stats = limiter.stats()[0]
+    assert stats["retries"] == 2 and stats["throttled"] == 0
+
+    # Without transient=True (Gemini, where the router fails over) the first error is raised
+    errors.append(TimeoutError("read timed out"))
+    with pytest.raises(TimeoutError):
+        limiter.call("gemini", "m", request)
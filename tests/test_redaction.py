@@ -0,0 +1,34 @@
+from core.redaction import Redactor, luhn_valid, redact, redact_many
+
+
+def test_redacts_sa_specific_pii_in_one_pass():
+    text = (
+        "Call me on +27 82 123 4567 or 011-555-0199, email sipho@example.co.za. "
+        "ID 8001015009087, account no 62123456789."
+    )
+    result = redact(text)
+
+    assert "[PHONE REDACTED]" in result.text
+    assert "[ID NUMBER REDACTED]" in result.text
+    assert "account no [ACCOUNT REDACTED]" in result.text
+    assert "sipho@" not in result.text
+    assert result.counts == {"phone": 2, "email": 1, "sa_id": 1, "account": 1}
+    assert [text[s.start:s.end] for s in result.spans][0] == "+27 82 123 4567"
+
+
+def test_invalid_id_and_plain_numbers_are_left_alone():
+    assert not luhn_valid("8001015009088")
+    assert redact("bad id 8001015009088, sold 1500 units in 2019").counts == {}
+
+
+def test_redact_many_and_custom_detector_set():
+    results = redact_many(["0821234567", "no pii here"])
+    assert [r.text for r in results] == ["[PHONE REDACTED]", "no pii here"]
+    assert Redactor(detectors=()).redact("0821234567").text == "0821234567"
+
+
+def test_rejected_id_match_falls_back_to_phone_at_same_position():
+    # "0821234567 100" looks like an ID with separators but fails the date check
+    result = redact("phone 0821234567 100 times")
+    assert result.text == "phone [PHONE REDACTED] 100 times"
+    assert result.counts == {"phone": 1}
@@ -0,0 +1,56 @@
+from core.render import (
+    JD_SECTIONS, SAMPLE_PROFILE, Block, PdfRenderer, parse_markdown, replace_sections, split_sections, to_markdown,
+)
+from core.utils import create_pdf
+
+PROFILE = "# [FULL NAME - REDACTED]\n\n## 📝 Summary\nReliable **driver**.\n* Code 10\n- Route planning"
+
+
+def test_parse_markdown_builds_block_ast_once():
+    blocks = parse_markdown(PROFILE)
+    assert blocks == (
+        Block("heading", "[FULL NAME - REDACTED]"),
+        Block("blank", ""),
+        Block("subheading", "📝 Summary"),
+        Block("paragraph", "Reliable **driver**."),
+        Block("bullet", "Code 10"),
+        Block("bullet", "Route planning"),
+    )
+    assert parse_markdown(PROFILE) is blocks
+    assert "- Code 10" in to_markdown(blocks)
+
+
+def test_screen_keeps_inline_markdown_and_pdf_strips_it():
+    profile = "## 📝 Summary\n**Operational:** *Stock* control\n- **Driving:** Code 10\n  - Night routes\n### Extra"
+    blocks = parse_markdown(profile)
+    assert blocks[1] == Block("label", "**Operational:** *Stock* control")
+    assert blocks[3] == Block("bullet", "Night routes", 1)
+    assert to_markdown(blocks).split("\n")[1:] == [
+        "**Operational:** *Stock* control  ", "- **Driving:** Code 10", "  - Night routes", "### Extra"]
+
+    lines = PdfRenderer._lines(blocks, "Thandi")
+    assert lines[1] == ("label", "Operational: Stock control", 0)
+    assert lines[2][1] == "- Driving: Code 10" and lines[3][2] > 0
+
+
+def test_pdf_rendering_single_and_batch():
+    assert create_pdf(PROFILE, user_name="Thandi Nkosi").startswith(b"%PDF")
+    pdfs = PdfRenderer().render_many([(PROFILE, "A"), (PROFILE, "B")])
+    assert len(pdfs) == 2 and all(p.startswith(b"%PDF") for p in pdfs)
+
+
+def test_split_sections_by_emoji_and_position():
+    keys = [key for key, _ in split_sections(SAMPLE_PROFILE)]
+    assert keys == [None, "summary", "competencies", "experience", "attributes"]
+
+    translated = "## Amakhono\n- Ukuphatha isitoko\n\n## Umsebenzi\n- Ngiphethe isitolo\n"
+    assert [key for key, _ in split_sections(translated, order=JD_SECTIONS)] == ["competencies", "experience"]
+
+
+def test_replace_sections_keeps_other_sections_verbatim():
+    updated = replace_sections(SAMPLE_PROFILE, {"experience": "## 📈 Experience\n- Drove a forklift"})
+    before, after = dict(split_sections(SAMPLE_PROFILE)), dict(split_sections(updated))
+
+    assert after["experience"] == "## 📈 Experience\n- Drove a forklift\n\n"
+    assert all(after[key] == before[key] for key in (None, "summary", "competencies", "attributes"))
+    assert replace_sections("# Name\nno sections", {"experience": "x"}) is None
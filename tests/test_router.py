@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from core.router import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, ModelRouter
+
+
+class Model:
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def answer(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"answer from {self.name}"
+
+    def chunks(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        yield f"{self.name}:1"
+        yield f"{self.name}:2"
+
+
+def _router(models, **kwargs):
+    kwargs.setdefault("default_hedge_delay", 0.05)
+    return ModelRouter(list(models), lambda name: models[name], **kwargs)
+
+
+def test_slow_primary_is_hedged_to_the_next_model():
+    models = {"primary": Model("primary", delay=0.5), "backup": Model("backup")}
+    router = _router(models)
+
+    started = time.perf_counter()
+    routed = router.call(lambda llm: llm.answer())
+
+    assert routed.model == "backup" and routed.attempts == 2
+    assert time.perf_counter() - started < 0.4
+    assert router.stats()[1]["hedges"] == 1
+
+
+def test_errors_fail_over_and_open_the_circuit():
+    models = {"primary": Model("primary", error=ConnectionError("503")), "backup": Model("backup")}
+    router = _router(models, hedge=False, failure_threshold=1, cooldown=60)
+
+    routed = router.call(lambda llm: llm.answer())
+    assert routed.model == "backup" and routed.attempts == 2
+
+    assert router.stats()[0]["state"] == OPEN
+    assert router.candidates() == ["backup"]
+    router.call(lambda llm: llm.answer())
+    assert models["primary"].calls == 1
+
+
+def test_rate_limits_fail_over_without_counting_against_the_model():
+    from core.ratelimit import RateLimitError
+
+    models = {"primary": Model("primary", error=RateLimitError("next slot is 90s away")), "backup": Model("backup")}
+    router = _router(models, hedge=False, failure_threshold=1, cooldown=60)
+
+    assert router.call(lambda llm: llm.answer()).model == "backup"
+    primary = router.stats()[0]
+    assert primary["state"] == CLOSED and primary["errors"] == 0 and primary["error_rate"] == 0.0
+    assert primary["throttled"] == 1
+    assert router.candidates()[-1] == "primary"
+
+
+def test_open_circuit_becomes_half_open_after_cooldown():
+    models = {"only": Model("only", error=ConnectionError("503"))}
+    router = _router(models, hedge=False, failure_threshold=1, cooldown=0.05)
+
+    with pytest.raises(ConnectionError):
+        router.call(lambda llm: llm.answer())
+    with pytest.raises(CircuitOpenError):
+        router.call(lambda llm: llm.answer())
+
+    time.sleep(0.06)
+    models["only"].error = None
+    assert router.candidates() == ["only"]
+    assert router.stats()[0]["state"] == HALF_OPEN
+    router.call(lambda llm: llm.answer())
+    assert router.stats()[0]["state"] == CLOSED
+
+
+def test_invalid_input_is_not_retried_on_other_models():
+    models = {"primary": Model("primary", error=ValueError("blocked by safety filter")), "backup": Model("backup")}
+    router = _router(models, hedge=False)
+
+    with pytest.raises(ValueError):
+        router.call(lambda llm: llm.answer())
+    assert models["backup"].calls == 0
+    assert router.stats()[0]["state"] == CLOSED
+
+
+def test_faster_model_is_preferred_once_measured():
+    models = {"primary": Model("primary", delay=0.03), "backup": Model("backup")}
+    router = _router(models, hedge=False)
+    router.call(lambda llm: llm.answer())
+    assert router.candidates() == ["primary", "backup"]
+
+    router._record("backup", "complete", 0.001)
+    assert router.candidates() == ["backup", "primary"]
+
+
+def test_stream_hedges_on_first_chunk_and_keeps_one_winner():
+    models = {"primary": Model("primary", delay=0.5), "backup": Model("backup")}
+    router = _router(models)
+
+    chunks = [routed.result for routed in router.stream(lambda llm: llm.chunks())]
+
+    assert chunks == ["backup:1", "backup:2"]
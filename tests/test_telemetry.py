@@ -0,0 +1,38 @@
+import json
+import logging
+
+import pytest
+
+from core.telemetry import Tracer, classify
+
+
+def test_spans_nest_and_export(caplog):
+    tracer = Tracer()
+    with caplog.at_level(logging.INFO, logger="ithuba.trace"):
+        with tracer.span("generate", model="gemini-test") as span:
+            with tracer.span("provider.gemini"):
+                pass
+            span.set(cache_hit=True, output_chars=42)
+
+    recent = tracer.recent()
+    assert [r["span"] for r in recent] == ["provider.gemini", "generate"]
+    assert recent[0]["parent"] == "generate"
+    assert json.loads(caplog.records[-1].message)["model"] == "gemini-test"
+
+    text = tracer.prometheus_text()
+    assert 'ithuba_stage_duration_seconds_count{stage="generate",outcome="ok"} 1' in text
+    assert 'ithuba_cache_hits_total{stage="generate"} 1' in text
+
+
+def test_failures_are_typed():
+    tracer = Tracer()
+    with pytest.raises(ConnectionError):
+        with tracer.span("transcribe"):
+            raise ConnectionError("reset by peer")
+    with tracer.span("pdf") as span:
+        span.fail(RuntimeError("font missing"))
+
+    outcomes = {r["span"]: (r["outcome"], r["error_type"]) for r in tracer.recent()}
+    assert outcomes == {"transcribe": ("provider_error", "ConnectionError"), "pdf": ("error", "RuntimeError")}
+    assert classify(ValueError()) == "invalid_input"
+    assert tracer.summary()[0]["errors"] == 1